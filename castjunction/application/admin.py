@@ -3,7 +3,7 @@ from django.contrib import admin
 
 from reversion.admin import VersionAdmin
 
-from .models import Application, MobileAppVersion, AuditionInvite
+from .models import Application, ApplicationEvent, MobileAppVersion, AuditionInvite
 
 
 @admin.register(Application)
@@ -47,3 +47,21 @@ class AuditionInviteAdmin(admin.ModelAdmin):
     """Mobile app versions admin."""
 
     list_display = ("title", "description", "location", "date")
+
+
+@admin.register(ApplicationEvent)
+class ApplicationEventAdmin(admin.ModelAdmin):
+    """Outbox of application side effects."""
+
+    list_display = (
+        "id",
+        "application",
+        "state",
+        "created_at",
+        "processed_at",
+        "attempts",
+        "next_attempt_at",
+        "completed_steps",
+    )
+    list_filter = ("state", "processed_at")
+    raw_id_fields = ("application", "request_user")
@@ -5,7 +5,7 @@ class ApplicationConfig(AppConfig):
     name = "application"
 
     def ready(self):
-        from .signals import application_state_chaged
+        from .signals import application_state_chaged, application_deleted
         from actstream import registry
 
         registry.register(self.get_model("Application"))
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def populate_application_counts(apps, schema_editor):
+    """Count existing applications per job and state."""
+    Application = apps.get_model('application', 'Application')
+    JobApplicationCount = apps.get_model('application', 'JobApplicationCount')
+    counts = (
+        Application.objects.exclude(job=None)
+        .values('job_id', 'state')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    JobApplicationCount.objects.bulk_create(
+        [
+            JobApplicationCount(job_id=row['job_id'], state=row['state'], count=row['total'])
+            for row in counts
+        ],
+        batch_size=1000,
+    )
+
+
+def remove_application_counts(apps, schema_editor):
+    JobApplicationCount = apps.get_model('application', 'JobApplicationCount')
+    JobApplicationCount.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0005_job_notes'),
+        ('application', '0007_application_reason_for_rejection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobApplicationCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('intiated', 'Initiated'), ('pipelined', 'Pipelined'), ('ignored', 'Ignored'), ('applied', 'Applied'), ('shortlisted', 'Shortlisted'), ('invited', 'Invited'), ('invite_accepted', 'Invite_accepted'), ('invite_rejected', 'Invite_rejected'), ('audition_done', 'Audition_done'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('on_hold', 'On_hold'), ('job_closed', 'Job_closed')], max_length=50)),
+                ('count', models.IntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='application_counts', related_query_name='application_count', to='project.Job')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobapplicationcount',
+            unique_together=set([('job', 'state')]),
+        ),
+        migrations.RunPython(populate_application_counts, remove_application_counts),
+    ]
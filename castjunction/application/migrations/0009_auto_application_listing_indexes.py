@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0008_jobapplicationcount'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='application',
+            index_together=set([('job', 'created_at'), ('job', 'updated_at')]),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('application', '0009_auto_application_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('intiated', 'Initiated'), ('pipelined', 'Pipelined'), ('ignored', 'Ignored'), ('applied', 'Applied'), ('shortlisted', 'Shortlisted'), ('invited', 'Invited'), ('invite_accepted', 'Invite_accepted'), ('invite_rejected', 'Invite_rejected'), ('audition_done', 'Audition_done'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('on_hold', 'On_hold'), ('job_closed', 'Job_closed')], max_length=50)),
+                ('data', django.contrib.postgres.fields.jsonb.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='application.Application')),
+                ('request_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='applicationevent',
+            index_together=set([('processed_at', 'next_attempt_at')]),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0011_application_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicationevent',
+            name='completed_steps',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=list, help_text='Side effects already run by an attempt.'),
+        ),
+    ]
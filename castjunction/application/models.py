@@ -1,7 +1,11 @@
 """Application tracking and maintenance models."""
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import F
+from django.db.models.sql import InsertQuery
 from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.postgres.fields import JSONField
 from django_fsm import FSMField, transition, ConcurrentTransitionMixin
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 from project.models import Job
@@ -45,6 +49,83 @@ class State(models.Model):
     )
 
 
+class JobApplicationCountManager(models.Manager):
+    """Manager to keep per state application counters in sync."""
+
+    def adjust(self, job_id, state, delta):
+        """Add ``delta`` to the counter of ``state`` applications on a job."""
+        updated = self.filter(job_id=job_id, state=state).update(
+            count=F("count") + delta
+        )
+        if not updated and delta > 0:
+            counter, created = self.get_or_create(job_id=job_id, state=state)
+            self.filter(pk=counter.pk).update(count=F("count") + delta)
+
+
+class JobApplicationCount(models.Model):
+    """Number of applications on a job in each state."""
+
+    job = models.ForeignKey(
+        Job,
+        related_name="application_counts",
+        related_query_name="application_count",
+        on_delete=models.CASCADE,
+    )
+    state = models.CharField(max_length=50, choices=State.CHOICES)
+    count = models.IntegerField(default=0)
+
+    objects = JobApplicationCountManager()
+
+    class Meta:
+        """Meta options."""
+
+        unique_together = ("job", "state")
+
+
+class ApplicationManager(models.Manager):
+    """Manager for applications."""
+
+    def create_missing(self, job, user_ids):
+        """Create initiated applications on a job for users without one.
+
+        Ids of users that do not exist are skipped.
+        """
+        user_ids = set(map(int, user_ids))
+        existing = set(
+            self.filter(job=job, user_id__in=user_ids).values_list("user_id", flat=True)
+        )
+        missing = list(
+            User.objects.filter(id__in=user_ids - existing).values_list("id", flat=True)
+        )
+        if not missing:
+            return
+        created = self._insert_ignoring_conflicts(
+            [self.model(job=job, user_id=user_id) for user_id in missing]
+        )
+        # only rows this call inserted, not the ones a concurrent request did.
+        JobApplicationCount.objects.adjust(job.id, State.INTIATED, len(created))
+
+    def _insert_ignoring_conflicts(self, objs):
+        """Insert rows as bulk_create does, return ids of the ones inserted.
+
+        ``bulk_create(ignore_conflicts=True)`` can't tell skipped rows apart,
+        ``ON CONFLICT DO NOTHING RETURNING id`` only returns inserted ones.
+        """
+        fields = [
+            field
+            for field in self.model._meta.concrete_fields
+            if field is not self.model._meta.auto_field
+        ]
+        query = InsertQuery(self.model, ignore_conflicts=True)
+        query.insert_values(fields, objs)
+        ids = []
+        with connections[self.db].cursor() as cursor:
+            for sql, params in query.get_compiler(using=self.db).as_sql():
+                cursor.execute(sql + " RETURNING id", params)
+                ids.extend(row[0] for row in cursor.fetchall())
+        return ids
+
+
 class Application(TimeFieldsMixin, ConcurrentTransitionMixin):
     """Application for the jobs by Persons."""
 
@@ -76,14 +157,47 @@ class Application(TimeFieldsMixin, ConcurrentTransitionMixin):
     images = GenericRelation(Image, related_query_name=related_query_name)
     videos = GenericRelation(Video, related_query_name=related_query_name)
 
+    objects = ApplicationManager()
+
     class Meta:
         """Meta options."""
 
         unique_together = ("job", "user")
+        # (created_at, id) backs the cross-job listing of a casting director.
+        index_together = (
+            ("job", "created_at"),
+            ("job", "updated_at"),
+            ("created_at", "id"),
+        )
         verbose_name = "Application"
         verbose_name_plural = "Applications"
         permissions = (("can_reject_candidate", "Can reject a candiate."),)
 
+    def __init__(self, *args, **kwargs):
+        """Remember the state stored in database to update job counters."""
+        super().__init__(*args, **kwargs)
+        self._counted_state = self.__dict__.get("state")
+
+    def save(self, *args, **kwargs):
+        """Save application and move it between job's state counters."""
+        adding = self._state.adding
+        if not adding and self._counted_state is None:
+            # state was deferred while loading, read the stored one.
+            self._counted_state = (
+                Application.objects.filter(pk=self.pk)
+                .values_list("state", flat=True)
+                .first()
+            )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if self.job_id and (adding or self.state != self._counted_state):
+                if not adding:
+                    JobApplicationCount.objects.adjust(
+                        self.job_id, self._counted_state, -1
+                    )
+                JobApplicationCount.objects.adjust(self.job_id, self.state, 1)
+        self._counted_state = self.state
+
     @transition(
         field=state,
         source=[State.INTIATED, State.PIPELINED, State.IGNORED],
@@ -187,6 +301,74 @@ class Application(TimeFieldsMixin, ConcurrentTransitionMixin):
         return
 
 
+class ApplicationEventManager(models.Manager):
+    """Manager for the outbox of application side effects."""
+
+    def record(self, applications, request_user=None, data_for=None):
+        """Record state changes of applications in the current transaction.
+
+        Side effects are run by ``application.tasks.process_application_events``
+        once the transaction is committed.
+        """
+        events = []
+        for application in applications:
+            data = data_for(application) if data_for else None
+            if hasattr(data, "dict"):
+                # a QueryDict posted as form data.
+                data = data.dict()
+            events.append(
+                self.model(
+                    application=application,
+                    state=application.state,
+                    data=data,
+                    request_user_id=getattr(request_user, "pk", None),
+                )
+            )
+        self.bulk_create(events)
+
+        from .tasks import enqueue_event_processing
+
+        transaction.on_commit(enqueue_event_processing)
+
+    def pending(self):
+        """Events still to process and due for an attempt."""
+        return self.filter(
+            processed_at__isnull=True,
+            attempts__lt=self.model.MAX_ATTEMPTS,
+            next_attempt_at__lte=timezone.now(),
+        )
+
+
+class ApplicationEvent(models.Model):
+    """State change of an application whose side effects are still to run."""
+
+    MAX_ATTEMPTS = 5
+
+    application = models.ForeignKey(
+        Application, related_name="events", on_delete=models.CASCADE
+    )
+    state = models.CharField(max_length=50, choices=State.CHOICES)
+    data = JSONField(null=True, blank=True)
+    request_user = models.ForeignKey(
+        User, null=True, blank=True, related_name="+", on_delete=models.SET_NULL
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    completed_steps = JSONField(
+        default=list, blank=True, help_text="Side effects already run by an attempt."
+    )
+
+    objects = ApplicationEventManager()
+
+    class Meta:
+        """Meta options."""
+
+        index_together = ("processed_at", "next_attempt_at")
+
+
 class MobileAppVersion(TimeFieldsMixin, StatusFieldMixin):
     version_code = models.IntegerField(default=1)
     app_type = models.CharField(
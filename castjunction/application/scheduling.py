@@ -0,0 +1,220 @@
+"""Schedule audition invites of a job into slots of its audition range."""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django_fsm import can_proceed
+
+from postman.api import pm_bulk_write
+from project.models import Job
+
+from .models import Application, AuditionInvite, State
+from .serializers import AuditionScheduleSerializer
+from .transitions import bulk_transition
+
+# class of the advisory locks held on talents while their slots are given.
+AUDITION_USER_LOCK_CLASS = 7302
+
+
+def _audition_settings():
+    """Return day start, day end and minimal gap between two auditions."""
+    return (
+        getattr(settings, "AUDITION_DAY_START", time(10)),
+        getattr(settings, "AUDITION_DAY_END", time(18)),
+        timedelta(minutes=getattr(settings, "AUDITION_MIN_GAP_MINUTES", 60)),
+    )
+
+
+def audition_days(job):
+    """Return the dates of job's audition range."""
+    audition_range = job.audition_range
+    if not audition_range or not audition_range.lower or not audition_range.upper:
+        return []
+    first = audition_range.lower
+    if not audition_range.lower_inc:
+        first += timedelta(days=1)
+    last = audition_range.upper
+    if not audition_range.upper_inc:
+        last -= timedelta(days=1)
+    return [first + timedelta(days=n) for n in range((last - first).days + 1)]
+
+
+def slot_length(job):
+    """Return how long one audition of the job lasts."""
+    day_start, day_end, __ = _audition_settings()
+    day = datetime.combine(datetime.min, day_end) - datetime.combine(
+        datetime.min, day_start
+    )
+    return day / job.auditions_per_day
+
+
+def audition_slots(job):
+    """Return every slot of the job, ``auditions_per_day`` evenly in a day."""
+    day_start, __, __ = _audition_settings()
+    per_day = job.auditions_per_day or 0
+    if per_day <= 0:
+        return []
+    tz = timezone.get_current_timezone()
+    length = slot_length(job)
+    slots = []
+    for day in audition_days(job):
+        start = timezone.make_aware(datetime.combine(day, day_start), tz)
+        slots.extend(start + length * n for n in range(per_day))
+    return slots
+
+
+def _conflicts(slot, busy, gap):
+    return any(abs(slot - other) < gap for other in busy)
+
+
+def _lock_users(user_ids):
+    """Serialize scheduling of the same talents until commit, in id order."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s, key) FROM"
+            " (SELECT unnest(%s::integer[]) AS key ORDER BY 1) AS keys",
+            [AUDITION_USER_LOCK_CLASS, sorted(set(user_ids))],
+        )
+
+
+def schedule_auditions(job, application_ids, request_user, data):
+    """Invite applications of a job to auditions in free slots.
+
+    Slots already given to the job's invites are skipped, and a talent is
+    never given a slot closer than the minimal gap to an audition of any
+    other job. Invites, their through rows and postman messages are written
+    in bulk, then applications move to invited with their side effects.
+
+    The job row is locked first and talents are locked by advisory locks,
+    so concurrent schedules of the job or of the same talents read taken
+    slots only once the previous one committed.
+
+    ``data`` holds title, description, location and audition_type of the
+    invites, ValidationError is raised if they are not valid. Returns the
+    invited applications and a list of ``(application, error)``.
+    """
+    serializer = AuditionScheduleSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    details = serializer.validated_data
+    __, __, gap = _audition_settings()
+    errors = []
+    with transaction.atomic():
+        Job.objects.select_for_update().get(pk=job.pk)
+        applications = list(
+            Application.objects.select_for_update()
+            .filter(job=job, id__in=application_ids)
+            .select_related("user")
+        )
+        candidates = []
+        for application in applications:
+            method = (
+                application.invited
+                if application.state == State.SHORTLISTED
+                else application.direct_invited
+            )
+            if can_proceed(method):
+                candidates.append(application)
+            else:
+                errors.append(
+                    (
+                        application,
+                        "Can't invite an application in state {}".format(
+                            application.state
+                        ),
+                    )
+                )
+
+        _lock_users(application.user_id for application in candidates)
+        slots = audition_slots(job)
+        if not slots:
+            errors.extend(
+                (application, "Job has no audition range or auditions per day.")
+                for application in candidates
+            )
+            return [], errors
+        # invites of the job last a slot, whenever they start.
+        length = slot_length(job)
+        taken = list(
+            AuditionInvite.objects.filter(
+                applications__job=job,
+                date__range=(slots[0] - length, slots[-1] + length),
+            ).values_list("date", flat=True)
+        )
+        busy = defaultdict(list)
+        for user_id, date in AuditionInvite.objects.filter(
+            applications__user__in=[application.user_id for application in candidates],
+            date__range=(slots[0] - gap, slots[-1] + gap),
+        ).values_list("applications__user_id", "date"):
+            busy[user_id].append(date)
+
+        free = [slot for slot in slots if not _conflicts(slot, taken, length)]
+        scheduled = []
+        for application in candidates:
+            user_busy = busy[application.user_id]
+            for index, slot in enumerate(free):
+                if not _conflicts(slot, user_busy, gap):
+                    scheduled.append((application, free.pop(index)))
+                    user_busy.append(slot)
+                    break
+            else:
+                errors.append(
+                    (application, "No free audition slot left in the audition range.")
+                )
+        if not scheduled:
+            return [], errors
+
+        messages = pm_bulk_write(
+            request_user,
+            [
+                (
+                    application.user,
+                    details["title"],
+                    "Hi {}, {} at location {} on {}".format(
+                        application.user.first_name,
+                        details["description"],
+                        details["location"],
+                        slot,
+                    ),
+                )
+                for application, slot in scheduled
+            ],
+            set_thread=True,
+        )
+        invites = [
+            AuditionInvite(date=slot, message_id=message.id, **details)
+            for (application, slot), message in zip(scheduled, messages)
+        ]
+        AuditionInvite.objects.bulk_create(invites)
+        AuditionInvite.applications.through.objects.bulk_create(
+            [
+                AuditionInvite.applications.through(
+                    auditioninvite_id=invite.id, application_id=application.id
+                )
+                for (application, slot), invite in zip(scheduled, invites)
+            ]
+        )
+        invite_ids = {
+            application.id: (invite.id, invite.message_id)
+            for (application, slot), invite in zip(scheduled, invites)
+        }
+
+        def method_for(application):
+            if application.state == State.SHORTLISTED:
+                return "invited"
+            return "direct_invited"
+
+        def data_for(application):
+            invite_id, message_id = invite_ids[application.id]
+            return {"audition_invite_id": invite_id, "message_id": message_id}
+
+        # rows are locked and checked above, every transition proceeds.
+        changed, __ = bulk_transition(
+            Application.objects.filter(id__in=invite_ids.keys()),
+            method_for,
+            request_user,
+            data_for,
+            write_invites=False,
+        )
+    return changed, errors
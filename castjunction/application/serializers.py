@@ -1,8 +1,10 @@
 """Serializers for application app."""
+from django.db import models
 from rest_framework import serializers
 
 from .models import Application, MobileAppVersion, AuditionInvite
 from project.serializers import JobShortSerializer
+from users.utils import prefetch_user_relations
 
 
 class AuditionInviteSerializer(serializers.ModelSerializer):
@@ -30,6 +32,35 @@ class AuditionInviteSerializer(serializers.ModelSerializer):
         }
 
 
+class AuditionScheduleSerializer(AuditionInviteSerializer):
+    """Details shared by the invites of a schedule, dates are given by slots."""
+
+    message_id = None
+
+    class Meta(AuditionInviteSerializer.Meta):
+        """Meta."""
+
+        fields = ("title", "description", "location", "audition_type")
+
+
+class ApplicationListSerializer(serializers.ListSerializer):
+    """Serialize a page of applications resolving applicants' media at once."""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        applications = list(iterable)
+        user = None
+        if "request" in self.context:
+            user = self.context["request"].user
+        self.child._user_prefetched = prefetch_user_relations(
+            [application.user for application in applications], user
+        )
+        try:
+            return super().to_representation(applications)
+        finally:
+            self.child._user_prefetched = None
+
+
 class ApplicationSerializer(serializers.ModelSerializer):
     """Serializer for application model."""
 
@@ -50,6 +81,7 @@ class ApplicationSerializer(serializers.ModelSerializer):
             "audition_invites",
             "reason_for_rejection",
         )
+        list_serializer_class = ApplicationListSerializer
 
     def get_user(self, obj):
         # Imported here to avoid circular import error.
@@ -59,6 +91,7 @@ class ApplicationSerializer(serializers.ModelSerializer):
         serializer = UserSerializer(
             obj.user, context={"request": self.context["request"]}, **extra_kwargs
         )
+        serializer._prefetched = getattr(self, "_user_prefetched", None)
         return serializer.data
 
 
@@ -67,6 +100,7 @@ class ApplicationDetailSerializer(ApplicationSerializer):
 
     class Meta:
         model = Application
+        list_serializer_class = ApplicationListSerializer
 
 
 class MobileAppVersionSerializer(serializers.ModelSerializer):
@@ -1,10 +1,11 @@
 """signals for application app."""
 import json
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings as django_settings
 
-from postman.api import pm_write
+from postman.models import Message
 
 from actstream import action
 from users.utils import (
@@ -15,17 +16,63 @@ from users.utils import (
 from messaging.tasks import send_push_notification, send_app_notification
 from messaging.messages import JOB_SHORTLISTED_MESSAGE, JOB_INVITE_MESSAGE
 from messaging.mails import JobShortlistedEmailNotification, JobInviteEmailNotification
-from .models import Application, State
-from .serializers import AuditionInviteSerializer
+from .models import Application, ApplicationEvent, State, JobApplicationCount
+from .utils import audition_invite_serializer, write_audition_invite
 
 from user_tokens.accounts_manager import credit_to_reimbursement_account
 
 
 @receiver(post_save, sender=Application)
 def application_state_chaged(sender, created, instance, **kwargs):
-    """Record activities of user."""
+    """Record the state change, its side effects run in a worker.
+
+    An invite and its message are written right here, in the transaction of
+    the change, so invalid invite data fails the change itself.
+    """
+    if instance.state == State.INTIATED:
+        return
+    if not created and instance._counted_state == instance.state:
+        return
+    data = getattr(instance, "_extra_data", None)
+    request_user = getattr(instance, "_request_user", None)
+    if instance.state == State.INVITED:
+        data = write_audition_invite(
+            instance, request_user, audition_invite_serializer(instance, data)
+        )
+    ApplicationEvent.objects.record([instance], request_user, lambda application: data)
+
+
+def run_step(event, name, func, *args, **kwargs):
+    """Run one side effect of an event unless an earlier attempt did.
+
+    The step is saved as completed in its own short transaction, with the
+    database writes of the step, whether later steps fail or not.
+    """
+    if event is not None and name in event.completed_steps:
+        return
+    with transaction.atomic():
+        func(*args, **kwargs)
+        if event is not None:
+            event.completed_steps.append(name)
+            ApplicationEvent.objects.filter(id=event.id).update(
+                completed_steps=event.completed_steps
+            )
+
+
+def notify_state_change(instance, event=None):
+    """Send actions, payments and notifications for application's new state.
+
+    Run by ``application.tasks`` for every recorded ApplicationEvent, each
+    step at most once per event however many attempts it takes.
+    """
+
+    def step(name, func, *args, **kwargs):
+        run_step(event, name, func, *args, **kwargs)
+
     if instance.state != State.INTIATED:
-        action.send(
+        step(
+            "action",
+            action.send,
             instance.user,
             verb=u"{}".format(instance.state),
             action_object=instance,
@@ -40,7 +87,9 @@ def application_state_chaged(sender, created, instance, **kwargs):
                 instance.job.required_tokens * django_settings.CREDIT_TOKEN_VALUE
             )
             amount = get_incetive_amount(incentive_plan, "application", total_amount)
-            credit_to_reimbursement_account(
+            step(
+                "incentive",
+                credit_to_reimbursement_account,
                 job_creator,
                 amount,
                 merchant_reference="application_{}".format(instance.id),
@@ -49,7 +98,13 @@ def application_state_chaged(sender, created, instance, **kwargs):
     if instance.state == State.SHORTLISTED:
         # send push notification
         extra_data = {"extra": {"data": json.dumps({"job_id": instance.job.id})}}
-        send_push_notification(instance.user, JOB_SHORTLISTED_MESSAGE, **extra_data)
+        step(
+            "push",
+            send_push_notification,
+            instance.user,
+            JOB_SHORTLISTED_MESSAGE,
+            **extra_data
+        )
         # send email notifications
         if instance.user.preferences.email_notification:
             context = {
@@ -58,38 +113,25 @@ def application_state_chaged(sender, created, instance, **kwargs):
                 "url": django_settings.JOB_OPPORTUNITIES_URL,
                 "domain": django_settings.DOMAIN,
             }
-            JobShortlistedEmailNotification(instance.user.email, context=context).send()
+            step(
+                "email",
+                JobShortlistedEmailNotification(
+                    instance.user.email, context=context
+                ).send,
+            )
 
     if instance.state == State.INVITED:
         data = instance._extra_data
-        data.update({"applications": [instance.id]})
-        audition_serializer = AuditionInviteSerializer(data=data)
-        audition_serializer.is_valid(raise_exception=True)
-        audition_serializer.save()
-        # send message to user who applied to this job.
-        subject = audition_serializer.validated_data.get("title")
-        body = "Hi {}, {} at location {} on {}".format(
-            instance.user.first_name,
-            audition_serializer.validated_data["description"],
-            audition_serializer.validated_data["location"],
-            audition_serializer.validated_data["date"],
-        )
         sender = instance._request_user
         recipient = instance.user
-        message = pm_write(
-            sender=sender,
-            recipient=recipient,
-            subject=subject,
-            body=body,
-            skip_notification=True,
-            set_thread=True,
-        )
-
-        audition_serializer.save(message_id=message.id)
+        # invite and message were written with the state change.
+        message = Message.objects.filter(id=data.get("message_id")).first()
 
         # send message notification to sender.
-        if recipient.preferences.app_notification:
-            send_app_notification(
+        if message and recipient.preferences.app_notification:
+            step(
+                "app_notification",
+                send_app_notification,
                 sender=sender,
                 verb=u"sent a message ",
                 action_object=message,
@@ -98,7 +140,9 @@ def application_state_chaged(sender, created, instance, **kwargs):
             )
         # send push notification
         extra_data = {"extra": {"data": json.dumps({"job_id": instance.job.id})}}
-        send_push_notification(recipient, JOB_INVITE_MESSAGE, **extra_data)
+        step(
+            "push", send_push_notification, recipient, JOB_INVITE_MESSAGE, **extra_data
+        )
         if recipient.preferences.email_notification:
             context = {
                 "first_name": instance.user.first_name,
@@ -106,18 +150,29 @@ def application_state_chaged(sender, created, instance, **kwargs):
                 "url": django_settings.JOB_OPPORTUNITIES_URL,
                 "domain": django_settings.DOMAIN,
             }
-            JobInviteEmailNotification(recipient.email, context=context).send()
+            step(
+                "email",
+                JobInviteEmailNotification(recipient.email, context=context).send,
+            )
 
     if instance.state == State.REJECTED:
-        data = instance._extra_data
-        Application.objects.filter(id=instance.id).update(
-            reason_for_rejection=data.get("reason_for_rejection")
-        )
+        # the reason was written with the state change.
         extra_data = {"extra": {"data": json.dumps({"job_id": instance.job.id})}}
-        send_push_notification(
+        step(
+            "push",
+            send_push_notification,
             instance.user,
             "Your Application on audition {} has been rejected.".format(
                 instance.job.title
             ),
             **extra_data
         )
+
+
+@receiver(post_delete, sender=Application)
+def application_deleted(sender, instance, **kwargs):
+    """Remove deleted application from its job's state counter."""
+    if instance.job_id and instance._counted_state:
+        JobApplicationCount.objects.adjust(
+            instance.job_id, instance._counted_state, -1
+        )
@@ -0,0 +1,85 @@
+"""Background tasks for application app.
+
+Side effects of application state changes are recorded as ApplicationEvent
+rows in the transaction of the change and run here, on the
+``APPLICATION_EVENTS_QUEUE`` queue. A failed event is attempted again later,
+with a growing delay, up to ``ApplicationEvent.MAX_ATTEMPTS`` times.
+"""
+import traceback
+from datetime import timedelta
+
+import django_rq
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ApplicationEvent
+
+APPLICATION_EVENT_BATCH_SIZE = 100
+# time a worker has to run the side effects of an event it claimed.
+APPLICATION_EVENT_LEASE = timedelta(minutes=10)
+
+
+def events_queue_name():
+    return getattr(settings, "APPLICATION_EVENTS_QUEUE", "events")
+
+
+def enqueue_event_processing():
+    """Wake a worker up to process recorded events."""
+    django_rq.get_queue(events_queue_name()).enqueue(process_application_events)
+
+
+def process_application_events(batch_size=APPLICATION_EVENT_BATCH_SIZE):
+    """Process due events by batches until none is left, returns their number."""
+    processed = 0
+    while True:
+        event_ids = list(
+            ApplicationEvent.objects.pending()
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        for event_id in event_ids:
+            processed += process_application_event(event_id)
+        if len(event_ids) < batch_size:
+            return processed
+
+
+def process_application_event(event_id):
+    """Run side effects of one event, returns 1 if they succeeded.
+
+    The event is claimed in a short transaction which moves its next attempt
+    past ``APPLICATION_EVENT_LEASE``, so concurrent workers skip it and no
+    transaction stays open while notifications go out. A worker killed
+    midway leaves the event to another attempt once the lease is over.
+    """
+    from .signals import notify_state_change
+
+    with transaction.atomic():
+        event = (
+            ApplicationEvent.objects.pending()
+            .select_for_update(skip_locked=True)
+            .filter(id=event_id)
+            .first()
+        )
+        if event is None:
+            return 0
+        event.attempts += 1
+        event.next_attempt_at = timezone.now() + APPLICATION_EVENT_LEASE
+        event.save(update_fields=["attempts", "next_attempt_at"])
+    application = event.application
+    application.__dict__["state"] = event.state
+    application._extra_data = dict(event.data or {})
+    application._request_user = event.request_user
+    events = ApplicationEvent.objects.filter(id=event.id)
+    try:
+        # each step saves its completion, the completed ones are kept.
+        notify_state_change(application, event)
+    except Exception:
+        # given up after MAX_ATTEMPTS, the event is kept for inspection.
+        events.update(
+            last_error=traceback.format_exc(),
+            next_attempt_at=timezone.now() + timedelta(minutes=2 ** event.attempts),
+        )
+        return 0
+    events.update(processed_at=timezone.now())
+    return 1
@@ -1,3 +1,95 @@
+"""Tests for application app."""
+from datetime import date, timedelta
+
 from django.test import TestCase
+from psycopg2.extras import DateRange
+
+from project.models import Job
+from users.models import User
+
+from .models import Application, AuditionInvite, JobApplicationCount, State
+from .scheduling import audition_slots, schedule_auditions
+
+
+class CreateMissingTest(TestCase):
+    """Applications created on a job for a batch of users."""
+
+    def setUp(self):
+        self.director = User.objects.create(
+            email="director@example.com", user_type=User.COMPANY
+        )
+        self.job = Job.objects.create(title="Lead", created_by=self.director)
+        self.users = [
+            User.objects.create(email="talent{}@example.com".format(n))
+            for n in range(2)
+        ]
+
+    def initiated_count(self):
+        return JobApplicationCount.objects.get(job=self.job, state=State.INTIATED).count
+
+    def test_missing_user_is_skipped(self):
+        missing_id = User.objects.order_by("-id").first().id + 1
+        user_ids = [user.id for user in self.users] + [missing_id]
+        Application.objects.create_missing(self.job, user_ids)
+        self.assertSetEqual(
+            set(self.job.applications.values_list("user_id", flat=True)),
+            set(user.id for user in self.users),
+        )
+        self.assertEqual(self.initiated_count(), 2)
+
+        Application.objects.create_missing(self.job, user_ids)
+        self.assertEqual(self.job.applications.count(), 2)
+        self.assertEqual(self.initiated_count(), 2)
+
+
+class ScheduleAuditionsTest(TestCase):
+    """Slots given to invites of a job and of a talent."""
+
+    details = {"title": "Audition", "description": "Lead", "location": "Studio"}
+
+    def setUp(self):
+        self.director = User.objects.create(
+            email="director@example.com", user_type=User.COMPANY
+        )
+        first = date.today() + timedelta(days=1)
+        self.jobs = [
+            Job.objects.create(
+                title="Lead {}".format(n),
+                created_by=self.director,
+                auditions_per_day=8,
+                audition_range=DateRange(first, first, "[]"),
+            )
+            for n in range(2)
+        ]
+        # one hour slots from 10:00 to 17:00, the minimal gap is one hour.
+        self.slots = audition_slots(self.jobs[0])
+
+    def apply(self, job, email):
+        user, __ = User.objects.get_or_create(email=email)
+        return Application.objects.create(job=job, user=user)
+
+    def invite(self, application, when):
+        invite = AuditionInvite.objects.create(date=when, **self.details)
+        invite.applications.add(application)
+
+    def schedule(self, application):
+        changed, errors = schedule_auditions(
+            application.job, [application.id], self.director, self.details
+        )
+        self.assertEqual(errors, [])
+        return AuditionInvite.objects.get(applications=application).date
+
+    def test_job_slots_taken(self):
+        first = self.apply(self.jobs[0], "first@example.com")
+        self.assertEqual(self.schedule(first), self.slots[0])
+        # an invite written by hand between two slots takes both.
+        other = self.apply(self.jobs[0], "other@example.com")
+        self.invite(other, self.slots[1] + timedelta(minutes=30))
+        second = self.apply(self.jobs[0], "second@example.com")
+        self.assertEqual(self.schedule(second), self.slots[3])
 
-# Create your tests here.
+    def test_talent_gap(self):
+        elsewhere = self.apply(self.jobs[1], "talent@example.com")
+        self.invite(elsewhere, self.slots[0] + timedelta(minutes=30))
+        application = self.apply(self.jobs[0], "talent@example.com")
+        self.assertEqual(self.schedule(application), self.slots[2])
@@ -0,0 +1,113 @@
+"""Apply application state transitions to many applications at once."""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+from django_fsm import can_proceed, has_transition_perm
+from rest_framework.exceptions import ValidationError
+
+from .models import Application, ApplicationEvent, JobApplicationCount, State
+from .utils import audition_invite_serializer, write_audition_invite
+
+
+def bulk_transition(
+    queryset, method_for, request_user, data_for, check_perm=False, write_invites=True
+):
+    """Move applications to new states with one update per state change.
+
+    ``method_for(application)`` names the transition of an application and
+    ``data_for(application)`` returns the data posted with it. Transitions
+    are checked in memory on rows locked for the update, side effects of
+    every changed application run in one background job.
+
+    Invites of applications moving to invited are validated with the other
+    checks and written with the update, unless ``write_invites`` is False
+    because the caller already wrote them. The reason of a rejection is
+    written with the update too.
+
+    Returns the changed applications and a list of ``(application, error)``.
+    """
+    changed, errors = [], []
+    invites = {}
+    with transaction.atomic():
+        applications = list(queryset.select_for_update())
+        groups = defaultdict(list)
+        for application in applications:
+            name = method_for(application)
+            method = getattr(application, name or "", None)
+            if method is None or not hasattr(method, "_django_fsm"):
+                errors.append(
+                    (application, "Application state can not be {}".format(name))
+                )
+                continue
+            if not can_proceed(method):
+                errors.append(
+                    (
+                        application,
+                        "Can't switch from state {0} TO {1} ".format(
+                            application.state, name
+                        ),
+                    )
+                )
+                continue
+            if check_perm and not has_transition_perm(method, request_user):
+                errors.append(
+                    (
+                        application,
+                        "You do not have permission to change state from {} TO {}".format(
+                            application.state, name
+                        ),
+                    )
+                )
+                continue
+            target = method._django_fsm.get_transition(application.state).target
+            if target == State.INVITED and write_invites:
+                try:
+                    invites[application.id] = audition_invite_serializer(
+                        application, data_for(application)
+                    )
+                except ValidationError as e:
+                    errors.append((application, e.detail))
+                    continue
+            groups[(application.job_id, application.state, target)].append(application)
+
+        now = timezone.now()
+        for (job_id, source, target), group in groups.items():
+            ids = [application.id for application in group]
+            Application.objects.filter(id__in=ids, state=source).update(
+                state=target, updated_at=now
+            )
+            if target == State.REJECTED:
+                # the reason is readable as soon as the rejection is.
+                reasons = defaultdict(list)
+                for application in group:
+                    reason = (data_for(application) or {}).get("reason_for_rejection")
+                    application.reason_for_rejection = reason
+                    reasons[reason].append(application.id)
+                for reason, reason_ids in reasons.items():
+                    Application.objects.filter(id__in=reason_ids).update(
+                        reason_for_rejection=reason
+                    )
+            if job_id:
+                JobApplicationCount.objects.adjust(job_id, source, -len(group))
+                JobApplicationCount.objects.adjust(job_id, target, len(group))
+            for application in group:
+                application.__dict__["state"] = target
+                application._counted_state = target
+            changed.extend(group)
+
+        event_data = {
+            application.id: write_audition_invite(
+                application, request_user, invites[application.id]
+            )
+            for application in changed
+            if application.id in invites
+        }
+        if changed:
+            ApplicationEvent.objects.record(
+                changed,
+                request_user,
+                lambda application: event_data.get(application.id)
+                or data_for(application),
+            )
+    return changed, errors
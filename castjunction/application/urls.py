@@ -9,6 +9,7 @@ from .views import (
     CheckUserProfileInfo,
     MultipleApplicationsViewSet,
     MultipleUsersViewSet,
+    ScheduleAuditionsView,
 )
 
 router = DefaultRouter()
@@ -31,6 +32,11 @@ urlpatterns = [
         MultipleUsersViewSet.as_view(),
         name="multiple_users_applications",
     ),
+    url(
+        r"jobs/(?P<job_id>[0-9]+)/schedule-auditions/",
+        ScheduleAuditionsView.as_view(),
+        name="schedule_auditions",
+    ),
     url(
         r"^mobile-app-version/(?P<version_code>[0-9]+)/",
         MobileAppVersionView.as_view(),
@@ -1,11 +1,25 @@
 """Utility for applications."""
 
 from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import transaction
 from rest_framework.exceptions import ValidationError
-from oscar_accounts import models
-from user_tokens.accounts_manager import create_limited_credit_account
+from oscar_accounts import models, exceptions
+from postman.api import pm_write
+from user_tokens.accounts_manager import (
+    create_limited_credit_account,
+    debit_tokens_from_user,
+    get_token_balance,
+)
 from utils.utils import check_person_information
 
+from .models import Application, State
+from .serializers import AuditionInviteSerializer
+
+# a submission of (user, job) holds this key while it is processed.
+APPLY_LOCK_KEY = "application:apply:{0}:{1}"
+APPLY_LOCK_TIMEOUT = 30
+
 
 def checks_before_apply(user, job):
     """Check person info and user's remaining token balance."""
@@ -13,23 +27,91 @@ def checks_before_apply(user, job):
     if False in result.values():
         raise ValidationError(result)
     try:
-        token_account = models.AccountType.objects.get(
-            name=django_settings.TOKEN_ACCOUNT
-        )
-        user_token_account = models.Account.objects.get(
-            primary_user=user, account_type=token_account
-        )
+        balance = get_token_balance(user)
     except models.Account.DoesNotExist:
-        reimbursement_acc = models.AccountType.objects.get(
-            name=django_settings.REIMBURSEMENT_ACCOUNT
+        create_limited_credit_account(
+            user=user, account_type=django_settings.TOKEN_ACCOUNT
         )
-        user_token_account = create_limited_credit_account(
-            user=user, account_type=token_account
+        create_limited_credit_account(
+            user=user, account_type=django_settings.REIMBURSEMENT_ACCOUNT
         )
-        create_limited_credit_account(user=user, account_type=reimbursement_acc)
+        balance = get_token_balance(user)
 
-    if user_token_account.balance < job.required_tokens:
+    if balance < job.required_tokens:
         raise ValidationError(
             {"credit": "You don't have enough tokens to apply to this job."}
         )
     return True
+
+
+def apply_to_job(user, job):
+    """Apply user to job once, however many times the request is submitted.
+
+    Returns the application and whether it was created.
+    """
+    key = APPLY_LOCK_KEY.format(user.id, job.id)
+    if not cache.add(key, 1, APPLY_LOCK_TIMEOUT):
+        raise ValidationError("Your application to this job is being processed.")
+    try:
+        application = Application.objects.filter(user=user, job=job).first()
+        if application and application.state not in [State.PIPELINED, State.IGNORED]:
+            # repeated submission, nothing to debit again.
+            return application, False
+        checks_before_apply(user, job)
+        with transaction.atomic():
+            application, created = Application.objects.get_or_create(
+                user=user, job=job
+            )
+            application = Application.objects.select_for_update().get(
+                pk=application.pk
+            )
+            if created or application.state in [State.PIPELINED, State.IGNORED]:
+                try:
+                    debit_tokens_from_user(user, job.required_tokens)
+                except exceptions.InsufficientFunds:
+                    raise ValidationError(
+                        {
+                            "credit": "You don't have enough tokens to apply to this job."
+                        }
+                    )
+                application.applied()
+                application.save()
+        return application, created
+    finally:
+        cache.delete(key)
+
+
+def audition_invite_serializer(application, data):
+    """Return the invite serializer of an application moving to invited.
+
+    Raises ValidationError if the posted invite data is not valid.
+    """
+    invite_data = {key: data.get(key) for key in data} if data else {}
+    invite_data["applications"] = [application.id]
+    serializer = AuditionInviteSerializer(data=invite_data)
+    serializer.is_valid(raise_exception=True)
+    return serializer
+
+
+def write_audition_invite(application, request_user, serializer):
+    """Save the invite and its message to the talent.
+
+    Runs in the transaction of the state change, returns the data of its
+    event: notifications about the invite are sent by the worker.
+    """
+    invite = serializer.save()
+    message = pm_write(
+        sender=request_user,
+        recipient=application.user,
+        subject=serializer.validated_data.get("title"),
+        body="Hi {}, {} at location {} on {}".format(
+            application.user.first_name,
+            serializer.validated_data["description"],
+            serializer.validated_data["location"],
+            serializer.validated_data["date"],
+        ),
+        skip_notification=True,
+        set_thread=True,
+    )
+    serializer.save(message_id=message.id)
+    return {"audition_invite_id": invite.id, "message_id": message.id}
@@ -1,7 +1,10 @@
 """Views for application app."""
 
+from collections import defaultdict
+
 import django_fsm
-from django_fsm import has_transition_perm
+from django.db import transaction
+from django.db.models import Q
 
 from rest_framework import viewsets, mixins, status, generics, filters
 from rest_framework.exceptions import NotFound, ValidationError
@@ -12,16 +15,19 @@ from project.models import Job
 from project.permissions import IsJobOwner
 from user_tokens.accounts_manager import debit_tokens_from_user
 from users.permissions import IsCastingDirector
-from users.models import User
 from utils.utils import check_person_information
 from utils import choices
+from utils.pagination import KeysetPaginationMixin, UpdatedAtKeysetPagination
 
 from .serializers import ApplicationSerializer, MobileAppVersionSerializer
 from .models import Application, State, MobileAppVersion
-from .utils import checks_before_apply
+from .scheduling import schedule_auditions
+from .transitions import bulk_transition
+from .utils import checks_before_apply, apply_to_job
 
 
 class ApplicationViewSet(
+    KeysetPaginationMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.UpdateModelMixin,
@@ -39,10 +45,15 @@ class ApplicationViewSet(
     filter_fields = ("state",)
     ordering_fields = ("updated_at",)
     ordering = ("-updated_at",)
+    keyset_pagination_class = UpdatedAtKeysetPagination
 
     def get_queryset(self):
         """Return all applications for this job id."""
-        return Application.objects.filter(job__id=self.kwargs["job_id"])
+        return (
+            Application.objects.filter(job__id=self.kwargs["job_id"])
+            .select_related("user")
+            .prefetch_related("audition_invites")
+        )
 
     def get_permissions(self):
         if self.request.method == "GET":
@@ -69,7 +80,6 @@ class ApplicationViewSet(
         if not action:
             raise ValidationError("Valid action key is required to create application.")
         elif action == State.APPLIED:
-            checks_before_apply(user, job)
             # keys = job.required_information_to_apply.keys()
             # for model_name in keys:
             #     data_dict = json.loads(job.required_information_to_apply[model_name])
@@ -118,14 +128,9 @@ class ApplicationViewSet(
             #                     raise ValidationError("{0} for {1} is not in range required {2}".format(value, field, v_range))
 
             # Everything is fine user can apply if has not applied before.
-            application, created = Application.objects.get_or_create(user=user, job=job)
+            application, created = apply_to_job(user, job)
             # serializer = self.serializer_class(application)
 
-            if created or application.state in [State.PIPELINED, State.IGNORED]:
-                debit_tokens_from_user(user, job.required_tokens)
-                application.applied()
-                application.save()
-
         elif action in [State.PIPELINED, State.IGNORED]:
             application, created = Application.objects.get_or_create(
                 user=user, job=job, state=action
@@ -163,12 +168,15 @@ class ApplicationViewSet(
                 raise ValidationError(
                     "Can't switch from state {0} TO {1} ".format(instance.state, state)
                 )
-            if instance.state == State.APPLIED:
-                debit_tokens_from_user(instance.user, instance.job.required_tokens)
-
+            if instance.state == State.REJECTED:
+                instance.reason_for_rejection = request.data.get("reason_for_rejection")
             instance._extra_data = request.data
             instance._request_user = request.user
-            instance.save()
+            with transaction.atomic():
+                # debit and state change are kept or lost together.
+                if instance.state == State.APPLIED:
+                    debit_tokens_from_user(instance.user, instance.job.required_tokens)
+                instance.save()
 
             serializer = self.get_serializer(instance)
             return Response(serializer.data)
@@ -229,43 +237,33 @@ class MultipleApplicationsViewSet(generics.CreateAPIView):
     def post(self, request, *args, **kwargs):
         """Change multiple application states. If invited send notifications."""
         data = request.data.copy()
-        application_ids = data.keys()
-        result = {}
-        applications = []
-        for application_id in application_ids:
-            applications.extend(
-                Application.objects.filter(
-                    job__id=data[application_id]["job_id"], id=application_id
-                )
-            )
-
-        for application in applications:
-            application_id = str(application.id)
-            state = data[application_id]["state"]
+        # keys of posted data are application ids.
+        posted = {int(application_id): value for application_id, value in data.items()}
+        ids_by_job = defaultdict(list)
+        for application_id, value in posted.items():
+            ids_by_job[value["job_id"]].append(application_id)
+        lookups = Q()
+        for job_id, application_ids in ids_by_job.items():
+            lookups |= Q(job__id=job_id, id__in=application_ids)
+        queryset = Application.objects.filter(lookups)
+
+        def method_for(application):
+            state = posted[application.id]["state"]
             if application.state == State.APPLIED and state == State.INVITED:
-                change_of_state = getattr(Application, "direct_invited")
-            else:
-                try:
-                    change_of_state = getattr(Application, state)
-                except AttributeError:
-                    result[application.id] = {
-                        "error": "Application state can not be {}".format(state),
-                        "user_id": application.user.id,
-                    }
-                    continue
-            try:
-                change_of_state(application)
-                application._extra_data = request.data[application_id]
-                application._request_user = request.user
-                application.save()
-                result[application_id] = "sucess"
-            except django_fsm.TransitionNotAllowed:
-                result[application.id] = {
-                    "error": "Can't switch from state {0} TO {1} ".format(
-                        application.state, state
-                    ),
-                    "user_id": application.user.id,
-                }
+                return "direct_invited"
+            return state
+
+        changed, errors = bulk_transition(
+            queryset,
+            method_for,
+            request.user,
+            lambda application: posted[application.id],
+        )
+        result = {}
+        for application in changed:
+            result[str(application.id)] = "sucess"
+        for application, error in errors:
+            result[application.id] = {"error": error, "user_id": application.user_id}
         return Response(result)
 
 
@@ -294,59 +292,62 @@ class MultipleUsersViewSet(generics.CreateAPIView):
         data = request.data.copy()
         user_ids = data.get("user_ids")
         if not user_ids:
-            raise ("user_ids are required to perform action.")
-        result = {"errors": [], "sucess": []}
-        users = User.objects.filter(id__in=user_ids)
+            raise ValidationError("user_ids are required to perform action.")
+        target_state = data.get("state")
+        self._validate_target_state(target_state)
         job = Job.objects.get(id=kwargs.get("job_id"))
-        for user in users:
-            target_state = data.get("state")
-
-            self._validate_target_state(target_state)
-
-            application, created = Application.objects.get_or_create(user=user, job=job)
+        Application.objects.create_missing(job, user_ids)
+        queryset = Application.objects.filter(job=job, user_id__in=user_ids)
 
+        def method_for(application):
             if application.state == State.SHORTLISTED and target_state == State.INVITED:
-                change_of_state = getattr(Application, "invited")
-            else:
-                try:
-                    change_of_state = getattr(Application, self.action[target_state])
-                except AttributeError:
-                    result[user.id] = {
-                        "error": "Application state can not be {}".format(self.action),
-                        "user_id": user.id,
-                    }
-                    continue
-            try:
+                return "invited"
+            return self.action[target_state]
+
+        changed, errors = bulk_transition(
+            queryset,
+            method_for,
+            request.user,
+            lambda application: data,
+            check_perm=True,
+        )
+        return Response(
+            {
+                "errors": [
+                    {"detail": error, "user_id": application.user_id}
+                    for application, error in errors
+                ],
+                "sucess": [
+                    {"application_id": application.id, "user_id": application.user_id}
+                    for application in changed
+                ],
+            }
+        )
 
-                bound_method = change_of_state.__dict__["__wrapped__"].__get__(
-                    application, Application
-                )
 
-                if not has_transition_perm(bound_method, request.user):
-                    result["errors"].append(
-                        {
-                            "detail": "You do not have permission to change state from {} TO {}".format(
-                                application.state, target_state
-                            ),
-                            "user_id": user.id,
-                        }
-                    )
-                    continue
-                change_of_state(application)
-                application._extra_data = request.data
-                application._request_user = request.user
-                application.save()
-                result["sucess"].append(
-                    {"application_id": application.id, "user_id": user.id}
-                )
-            except django_fsm.TransitionNotAllowed:
-                result["errors"].append(
-                    {
-                        "detail": "Can't switch from state {0} TO {1} ".format(
-                            application.state, target_state
-                        ),
-                        "user_id": user.id,
-                    }
-                )
+class ScheduleAuditionsView(generics.CreateAPIView):
 
-        return Response(result)
+    serializer_class = ApplicationSerializer
+    permission_classes = (IsAuthenticated, IsJobOwner)
+
+    def post(self, request, *args, **kwargs):
+        """Invite applications to auditions in free slots of job's range."""
+        application_ids = request.data.get("application_ids")
+        if not application_ids:
+            raise ValidationError("application_ids are required to schedule auditions.")
+        job = Job.objects.get(id=kwargs.get("job_id"))
+        changed, errors = schedule_auditions(
+            job, application_ids, request.user, request.data
+        )
+        return Response(
+            {
+                "errors": [
+                    {"detail": error, "application_id": application.id}
+                    for application, error in errors
+                ],
+                "sucess": [
+                    {"application_id": application.id, "user_id": application.user_id}
+                    for application in changed
+                ],
+            }
+        )
@@ -150,6 +150,23 @@ EMAIL_ASSESSMENT_SITE_NAME = "Stageroute"
 DEFAULT_FROM_EMAIL = "Brajesh at StageRoute <brajesh.s@stageroute.com>"
 STAGEROUTE_EMAIL = "StageRoute Team <team@stageroute.com>"
 
+# Drip campaigns run in parallel with `send_drips --parallel`.
+DRIP_QUEUE = "drips"
+DRIP_SHARD_SIZE = 5000  # recipients sent by one shard job.
+DRIP_CONCURRENCY = 4  # shards sending at the same time.
+DRIP_SEND_RATE = 14  # messages per second of one drip, SES default limit.
+
+# Side effects of application state changes run on this queue.
+APPLICATION_EVENTS_QUEUE = "events"
+
+# Scheduled auditions of a talent are at least this far apart.
+AUDITION_MIN_GAP_MINUTES = 60
+
+# Notify recipients of postman broadcasts from a background job.
+POSTMAN_ASYNC_BROADCAST_NOTIFICATION = True
+# Seconds before the cached unread messages counter is counted again.
+POSTMAN_UNREAD_COUNT_TIMEOUT = 15 * 60
+
 #######
 # AWS #
 #######
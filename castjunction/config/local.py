@@ -36,6 +36,19 @@ RQ_QUEUES = {
         "PORT": 6379,
         "DB": 0,
     },
+    # drip campaigns, see drip.tasks.
+    "drips": {
+        "HOST": "localhost",
+        "PORT": 6379,
+        "DB": 0,
+        "DEFAULT_TIMEOUT": 3600,
+    },
+    # side effects of application state changes, see application.tasks.
+    "events": {
+        "HOST": "localhost",
+        "PORT": 6379,
+        "DB": 0,
+    },
 }
 
 DATABASES = {
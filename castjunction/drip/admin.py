@@ -3,8 +3,10 @@ import json
 
 from django import forms
 from django.contrib import admin
+from django.db import models
 
-from drip.models import Drip, SentDrip, QuerySetRule
+from drip.models import Drip, SentDrip, QuerySetRule, DripRun
+from drip import preview
 from drip.drips import configured_message_classes, message_class_for
 from drip.utils import get_user_model
 
@@ -42,22 +44,20 @@ class DripAdmin(admin.ModelAdmin):
 
         drip = get_object_or_404(Drip, id=drip_id)
 
-        shifted_drips = []
-        seen_users = set()
-        for shifted_drip in drip.drip.walk(
-            into_past=int(into_past), into_future=int(into_future) + 1
-        ):
-            shifted_drip.prune()
-            shifted_drips.append(
-                {
-                    "drip": shifted_drip,
-                    "qs": shifted_drip.get_queryset().exclude(id__in=seen_users),
-                }
-            )
-            seen_users.update(shifted_drip.get_queryset().values_list("id", flat=True))
+        shifted_drips = preview.timeline(drip, int(into_past), int(into_future))
 
         return render(request, "drip/timeline.html", locals())
 
+    def dry_run(self, request, drip_id):
+        """
+        Return estimated and exact recipient counts of the drip as json.
+        """
+        from django.shortcuts import get_object_or_404
+        from django.http import JsonResponse
+
+        drip = get_object_or_404(Drip, id=drip_id)
+        return JsonResponse(preview.dry_run(drip))
+
     def view_drip_email(self, request, drip_id, into_past, into_future, user_id):
         from django.shortcuts import render, get_object_or_404
         from django.http import HttpResponse
@@ -113,6 +113,11 @@ class DripAdmin(admin.ModelAdmin):
                 self.av(self.view_drip_email),
                 name="view_drip_email",
             ),
+            url(
+                r"^(?P<drip_id>[\d]+)/dry-run/$",
+                self.av(self.dry_run),
+                name="drip_dry_run",
+            ),
         ]
         return my_urls + urls
 
@@ -126,3 +131,21 @@ class SentDripAdmin(admin.ModelAdmin):
 
 
 admin.site.register(SentDrip, SentDripAdmin)
+
+
+class DripRunAdmin(admin.ModelAdmin):
+    list_display = ["drip", "started", "finished", "sent", "shard_count"]
+    list_filter = ["drip"]
+    ordering = ["-id"]
+
+    def get_queryset(self, request):
+        qs = super(DripRunAdmin, self).get_queryset(request)
+        return qs.filter(parent__isnull=True).annotate(
+            num_shards=models.Count("shards")
+        )
+
+    def shard_count(self, obj):
+        return obj.num_shards
+
+
+admin.site.register(DripRun, DripRunAdmin)
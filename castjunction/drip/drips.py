@@ -2,14 +2,14 @@ import operator
 import functools
 
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import F, Q
 from django.template import Context, Template
 from importlib import import_module
 
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.utils.html import strip_tags
 
-from drip.models import SentDrip
+from drip.models import SentDrip, DripRun
 from drip.utils import get_user_model
 
 try:
@@ -65,7 +65,7 @@ class DripMessage(object):
     @property
     def subject(self):
         if not self._subject:
-            self._subject = Template(self.drip_base.subject_template).render(
+            self._subject = self.drip_base.compiled_subject_template.render(
                 self.context
             )
         return self._subject
@@ -73,7 +73,7 @@ class DripMessage(object):
     @property
     def body(self):
         if not self._body:
-            self._body = Template(self.drip_base.body_template).render(self.context)
+            self._body = self.drip_base.compiled_body_template.render(self.context)
         return self._body
 
     @property
@@ -132,6 +132,25 @@ class DripBase(object):
 
         self.now_shift_kwargs = kwargs.get("now_shift_kwargs", {})
 
+    @property
+    def compiled_subject_template(self):
+        """
+        Subject template compiled once and rendered for every user.
+        """
+        try:
+            return self._compiled_subject_template
+        except AttributeError:
+            self._compiled_subject_template = Template(self.subject_template)
+            return self._compiled_subject_template
+
+    @property
+    def compiled_body_template(self):
+        try:
+            return self._compiled_body_template
+        except AttributeError:
+            self._compiled_body_template = Template(self.body_template)
+            return self._compiled_body_template
+
     #########################
     ### DATE MANIPULATION ###
     #########################
@@ -172,7 +191,7 @@ class DripBase(object):
         """
         clauses = {"filter": [], "exclude": []}
 
-        for rule in self.drip_model.queryset_rules.all():
+        for rule in self.drip_model.get_rules():
 
             clause = clauses.get(rule.method_type, clauses["filter"])
 
@@ -222,11 +241,15 @@ class DripBase(object):
         ).values_list("user_id", flat=True)
         self._queryset = self.get_queryset().exclude(id__in=exclude_user_ids)
 
-    def send(self):
+    def send(self, drip_run=None, throttle=None):
         """
         Send the message to each user on the queryset.
 
-        Create SentDrip for each user that gets a message.
+        Users are streamed in chunks ordered by id over one mail connection,
+        SentDrips are created per chunk and the id of the last processed user
+        is stored on today's DripRun so an interrupted run resumes after it.
+        A shard ``drip_run`` limits users to its id range, ``throttle`` is
+        called before every message to rate limit sending.
 
         Returns count of created SentDrips.
         """
@@ -236,28 +259,63 @@ class DripBase(object):
                 settings, "DRIP_FROM_EMAIL", settings.DEFAULT_FROM_EMAIL
             )
         MessageClass = message_class_for(self.drip_model.message_class)
+        chunk_size = getattr(settings, "DRIP_CHUNK_SIZE", 500)
+
+        if drip_run is None:
+            drip_run = DripRun.objects.resume_or_start(
+                self.drip_model, now=conditional_now
+            )
+        queryset = self.get_queryset().order_by("id")
+        if drip_run.last_user_id is not None:
+            queryset = queryset.filter(id__lte=drip_run.last_user_id)
+        cursor = drip_run.cursor or 0
 
         count = 0
-        for user in self.get_queryset():
-            message_instance = MessageClass(self, user)
-            try:
-                result = message_instance.message.send()
-                if result:
-                    SentDrip.objects.create(
-                        drip=self.drip_model,
-                        user=user,
-                        from_email=self.from_email,
-                        from_email_name=self.from_email_name,
-                        subject=message_instance.subject,
-                        body=message_instance.body,
+        connection = get_connection()
+        connection.open()
+        try:
+            while True:
+                sent_drips = []
+                processed = 0
+                try:
+                    for user in queryset.filter(id__gt=cursor)[:chunk_size].iterator():
+                        processed += 1
+                        cursor = user.id
+                        message_instance = MessageClass(self, user)
+                        if throttle is not None:
+                            throttle()
+                        try:
+                            message = message_instance.message
+                            message.connection = connection
+                            if message.send():
+                                sent_drips.append(
+                                    SentDrip(
+                                        drip=self.drip_model,
+                                        user=user,
+                                        from_email=self.from_email,
+                                        from_email_name=self.from_email_name,
+                                        subject=message_instance.subject,
+                                        body=message_instance.body,
+                                    )
+                                )
+                        except Exception as e:
+                            logging.error(
+                                "Failed to send drip %s to user %s: %s"
+                                % (self.drip_model.id, user, e)
+                            )
+                finally:
+                    # record what was sent even if the chunk was interrupted.
+                    SentDrip.objects.bulk_create(sent_drips)
+                    DripRun.objects.filter(pk=drip_run.pk).update(
+                        cursor=cursor, sent=F("sent") + len(sent_drips)
                     )
-                    count += 1
-            except Exception as e:
-                logging.error(
-                    "Failed to send drip %s to user %s: %s"
-                    % (self.drip_model.id, user, e)
-                )
+                count += len(sent_drips)
+                if processed < chunk_size:
+                    break
+        finally:
+            connection.close()
 
+        DripRun.objects.filter(pk=drip_run.pk).update(finished=conditional_now())
         return count
 
     ####################
@@ -2,8 +2,26 @@ from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--parallel",
+            action="store_true",
+            dest="parallel",
+            default=False,
+            help="Enqueue drips and their recipient shards on the drip RQ queue.",
+        )
+
     def handle(self, *args, **options):
         from drip.models import Drip
 
+        if options["parallel"]:
+            from drip.tasks import enqueue_drips, drip_queue_name
+
+            jobs = enqueue_drips()
+            self.stdout.write(
+                "Enqueued %s drips on queue %s." % (len(jobs), drip_queue_name())
+            )
+            return
+
         for drip in Drip.objects.filter(enabled=True):
             drip.drip.run()
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drip', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DripRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('cursor', models.IntegerField(blank=True, help_text='Id of the last user processed in this run.', null=True)),
+                ('sent', models.IntegerField(default=0)),
+                ('drip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runs', to='drip.Drip')),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drip', '0002_driprun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driprun',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Run this shard of recipients belongs to.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='drip.DripRun'),
+        ),
+        migrations.AddField(
+            model_name='driprun',
+            name='last_user_id',
+            field=models.IntegerField(blank=True, help_text='Id of the last user in this shard.', null=True),
+        ),
+    ]
@@ -1,10 +1,15 @@
 from datetime import datetime, timedelta
+from uuid import uuid4
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.conf import settings
+from django.utils import timezone
 
-from drip.utils import get_user_model
+from drip.utils import get_user_model, explain_queryset
 
 # just using this to parse, but totally insane package naming...
 # https://bitbucket.org/schinckel/django-timedelta-field/
@@ -55,6 +60,27 @@ class Drip(models.Model):
         )
         return drip
 
+    @property
+    def revision(self):
+        """
+        Bumped whenever the drip or one of its rules changes.
+        """
+        return self.lastchanged.isoformat()
+
+    def get_rules(self):
+        """
+        Rules of this drip, loaded once per rules version and then cached.
+
+        The version lives in the cache and not on this instance, so a drip
+        loaded before its rules were edited does not read stale rules.
+        """
+        key = "drip_rules:%s:%s" % (self.id, rules_version(self.id))
+        rules = cache.get(key)
+        if rules is None:
+            rules = list(self.queryset_rules.all())
+            cache.set(key, rules, getattr(settings, "DRIP_RULES_CACHE_TIMEOUT", 3600))
+        return rules
+
     def __unicode__(self):
         return self.name
 
@@ -83,6 +109,64 @@ class SentDrip(models.Model):
     )
 
 
+class DripRunManager(models.Manager):
+    def resume_or_start(self, drip, now=datetime.now):
+        """
+        Return today's unfinished run of the drip, or start a new one.
+        """
+        drip_run = (
+            self.filter(
+                drip=drip,
+                parent__isnull=True,
+                finished__isnull=True,
+                started__date=now().date(),
+            )
+            .order_by("-started")
+            .first()
+        )
+        if drip_run is None:
+            drip_run = self.create(drip=drip)
+        return drip_run
+
+    def finish_parent(self, parent_id, now=datetime.now):
+        """
+        Aggregate shards into their parent run once all of them finished.
+        """
+        shards = self.filter(parent_id=parent_id)
+        if shards.filter(finished__isnull=True).exists():
+            return False
+        sent = shards.aggregate(sent=models.Sum("sent"))["sent"] or 0
+        self.filter(pk=parent_id).update(sent=sent, finished=now())
+        return True
+
+
+class DripRun(models.Model):
+    """
+    Progress of one run of a drip, used to resume an interrupted run.
+    """
+
+    drip = models.ForeignKey("drip.Drip", related_name="runs")
+    parent = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        related_name="shards",
+        help_text="Run this shard of recipients belongs to.",
+    )
+    started = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    cursor = models.IntegerField(
+        null=True, blank=True, help_text="Id of the last user processed in this run."
+    )
+    last_user_id = models.IntegerField(
+        null=True, blank=True, help_text="Id of the last user in this shard."
+    )
+    sent = models.IntegerField(default=0)
+
+    objects = DripRunManager()
+
+
 METHOD_TYPES = (
     ("filter", "Filter"),
     ("exclude", "Exclude"),
@@ -127,9 +211,12 @@ class QuerySetRule(models.Model):
     )
 
     def clean(self):
+        """
+        Validate the rule with EXPLAIN, the query is planned but never run.
+        """
         User = get_user_model()
         try:
-            self.apply(User.objects.all())
+            explain_queryset(self.apply(User.objects.all()))
         except Exception as e:
             raise ValidationError(
                 "%s raised trying to apply rule: %s" % (type(e).__name__, e)
@@ -198,3 +285,52 @@ class QuerySetRule(models.Model):
 
         # catch as default
         return qs.filter(**kwargs)
+
+
+RULES_VERSION_KEY = "drip_rules_version:%s"
+
+
+def rules_version(drip_id):
+    """
+    Current version of a drip's cached rules.
+    """
+    key = RULES_VERSION_KEY % drip_id
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_rules_version(drip_id):
+    """
+    Drop cached rules of a drip now and again once the change is committed.
+
+    Readers in between may cache the rules they still see as committed, the
+    second bump throws those away.
+    """
+    key = RULES_VERSION_KEY % drip_id
+    cache.set(key, uuid4().hex, None)
+    transaction.on_commit(lambda: cache.set(key, uuid4().hex, None))
+
+
+@receiver(post_save, sender=Drip, dispatch_uid="drip.drip_saved")
+@receiver(post_delete, sender=Drip, dispatch_uid="drip.drip_deleted")
+def drip_changed(sender, instance, **kwargs):
+    bump_rules_version(instance.id)
+
+
+@receiver(post_save, sender=QuerySetRule, dispatch_uid="drip.rule_saved")
+@receiver(post_delete, sender=QuerySetRule, dispatch_uid="drip.rule_deleted")
+def bump_drip_revision(sender, instance, **kwargs):
+    """
+    A changed rule invalidates the cached rules and previews of its drip.
+    """
+    now = timezone.now()
+    Drip.objects.filter(id=instance.drip_id).update(lastchanged=now)
+    bump_rules_version(instance.drip_id)
+    try:
+        # keep drip objects already in memory on the new revision too.
+        instance.drip.lastchanged = now
+    except Drip.DoesNotExist:
+        pass
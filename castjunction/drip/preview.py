@@ -0,0 +1,79 @@
+"""
+Set based preview of who gets a drip on which day.
+"""
+import functools
+import operator
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from drip.drips import conditional_now
+from drip.models import rules_version
+from drip.utils import explain_queryset, count_within
+
+
+def timeline(drip_model, into_past, into_future):
+    """
+    Return recipient count and a sample of recipients for every shifted day.
+
+    Every day is one COUNT and one small sample query, users already sent the
+    drip and users picked on a previous day are excluded with subqueries so no
+    user ids are loaded in memory. The result is cached per drip revision.
+    """
+    sample_size = getattr(settings, "DRIP_PREVIEW_SAMPLE_SIZE", 20)
+    key = "drip_timeline:%s:%s:%s:%s:%s:%s" % (
+        drip_model.id,
+        drip_model.revision,
+        rules_version(drip_model.id),
+        into_past,
+        into_future,
+        conditional_now().date().isoformat(),
+    )
+    days = cache.get(key)
+    if days is not None:
+        return days
+
+    days = []
+    previous_days = []
+    for shifted_drip in drip_model.drip.walk(
+        into_past=into_past, into_future=into_future + 1
+    ):
+        shifted_drip.prune()
+        qs = shifted_drip.get_queryset()
+        if previous_days:
+            qs = qs.exclude(
+                functools.reduce(operator.or_, [Q(id__in=ids) for ids in previous_days])
+            )
+        days.append(
+            {
+                "now": shifted_drip.now(),
+                "shift": shifted_drip.now_shift_kwargs.get("days", 0),
+                "count": qs.count(),
+                "users": list(qs.order_by("id").values("id", "email")[:sample_size]),
+            }
+        )
+        previous_days.append(shifted_drip.get_queryset().values_list("id", flat=True))
+
+    cache.set(key, days, getattr(settings, "DRIP_PREVIEW_CACHE_TIMEOUT", 600))
+    return days
+
+
+def dry_run(drip_model):
+    """
+    Return planner estimate and, within a time budget, exact recipient count.
+
+    ``exact`` is None when counting takes longer than
+    ``DRIP_DRY_RUN_TIMEOUT`` milliseconds.
+    """
+    drip = drip_model.drip
+    drip.prune()
+    qs = drip.get_queryset()
+    timeout = getattr(settings, "DRIP_DRY_RUN_TIMEOUT", 2000)
+    return {
+        "drip": drip_model.id,
+        "revision": drip_model.revision,
+        "estimated": int(explain_queryset(qs).get("Plan Rows", 0)),
+        "exact": count_within(qs, timeout),
+        "timeout": timeout,
+    }
@@ -0,0 +1,181 @@
+"""
+Run drips in parallel on RQ workers.
+
+Every enabled drip is planned by its own job, recipients of a drip are split
+into shards of ``DRIP_SHARD_SIZE`` users and every shard is sent by a separate
+job on the ``DRIP_QUEUE`` queue. Shards record their progress on their own
+DripRun and are aggregated into the parent DripRun once all of them finished.
+"""
+import time
+from datetime import timedelta
+
+import django_rq
+from django.conf import settings
+
+from drip.drips import conditional_now
+from drip.models import Drip, DripRun
+
+
+def drip_queue_name():
+    return getattr(settings, "DRIP_QUEUE", "drips")
+
+
+def enqueue_drips():
+    """
+    Enqueue planning of every enabled drip, returns the enqueued jobs.
+    """
+    queue = django_rq.get_queue(drip_queue_name())
+    return [
+        queue.enqueue(plan_drip, drip_id)
+        for drip_id in Drip.objects.filter(enabled=True).values_list("id", flat=True)
+    ]
+
+
+def plan_drip(drip_id):
+    """
+    Split recipients of a drip into shards and enqueue a job per shard.
+
+    Running it again for an unfinished run of today only re-enqueues the
+    shards which have not finished yet.
+    """
+    try:
+        drip_model = Drip.objects.get(id=drip_id, enabled=True)
+    except Drip.DoesNotExist:
+        return None
+
+    drip_run = DripRun.objects.resume_or_start(drip_model, now=conditional_now)
+    if not drip_run.shards.exists():
+        drip = drip_model.drip
+        drip.prune()
+        shard_size = getattr(settings, "DRIP_SHARD_SIZE", 5000)
+        lower = drip_run.cursor or 0
+        user_ids = (
+            drip.get_queryset()
+            .filter(id__gt=lower)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        shards = []
+        count = 0
+        for user_id in user_ids.iterator():
+            count += 1
+            if count == shard_size:
+                shards.append(
+                    DripRun(
+                        drip=drip_model,
+                        parent=drip_run,
+                        cursor=lower,
+                        last_user_id=user_id,
+                    )
+                )
+                lower = user_id
+                count = 0
+        if count:
+            shards.append(
+                DripRun(
+                    drip=drip_model, parent=drip_run, cursor=lower, last_user_id=user_id
+                )
+            )
+        if not shards:
+            DripRun.objects.finish_parent(drip_run.id, now=conditional_now)
+            return 0
+        DripRun.objects.bulk_create(shards)
+
+    shard_ids = list(
+        drip_run.shards.filter(finished__isnull=True).values_list("id", flat=True)
+    )
+    queue = django_rq.get_queue(drip_queue_name())
+    for shard_id in shard_ids:
+        queue.enqueue(run_drip_shard, shard_id)
+    return len(shard_ids)
+
+
+class SendRateLimiter(object):
+    """
+    Allow at most ``rate`` messages per second of a drip across all shards.
+    """
+
+    def __init__(self, connection, drip_id, rate):
+        self.connection = connection
+        self.drip_id = drip_id
+        self.rate = rate
+
+    def __call__(self):
+        if not self.rate:
+            return
+        while True:
+            second = int(time.time())
+            key = "drip_rate:%s:%s" % (self.drip_id, second)
+            sent = self.connection.incr(key)
+            self.connection.expire(key, 2)
+            if sent <= self.rate:
+                return
+            time.sleep(max(0, second + 1 - time.time()))
+
+
+def _acquire_slot(connection, shard_id):
+    """
+    Lease one of ``DRIP_CONCURRENCY`` slots for running shards.
+
+    Leases are the members of a sorted set scored by their expiry, a killed
+    worker can not keep its slot past ``DRIP_SHARD_TIMEOUT`` however busy the
+    other shards are.
+    """
+    key = "drip_running_shards"
+    now = time.time()
+    pipeline = connection.pipeline()
+    pipeline.zremrangebyscore(key, "-inf", now)
+    pipeline.zadd(
+        key, **{str(shard_id): now + getattr(settings, "DRIP_SHARD_TIMEOUT", 3600)}
+    )
+    pipeline.zcard(key)
+    running = pipeline.execute()[-1]
+    if running > getattr(settings, "DRIP_CONCURRENCY", 4):
+        _release_slot(connection, shard_id)
+        return False
+    return True
+
+
+def _release_slot(connection, shard_id):
+    # removing a lease twice is a no-op, the count can not go below zero.
+    connection.zrem("drip_running_shards", str(shard_id))
+
+
+def run_drip_shard(shard_id):
+    """
+    Send one shard of a drip and aggregate its run when it was the last one.
+    """
+    try:
+        shard = DripRun.objects.select_related("drip").get(id=shard_id)
+    except DripRun.DoesNotExist:
+        return None
+    if shard.finished is not None:
+        return None
+
+    connection = django_rq.get_connection(drip_queue_name())
+    lock = "drip_shard_lock:%s" % shard_id
+    timeout = getattr(settings, "DRIP_SHARD_TIMEOUT", 3600)
+    if not connection.set(lock, 1, nx=True, ex=timeout):
+        # this shard is already being sent by another worker.
+        return None
+    try:
+        if not _acquire_slot(connection, shard_id):
+            scheduler = django_rq.get_scheduler(drip_queue_name())
+            scheduler.enqueue_in(timedelta(seconds=30), run_drip_shard, shard_id)
+            return None
+        try:
+            drip = shard.drip.drip
+            drip.prune()
+            count = drip.send(
+                drip_run=shard,
+                throttle=SendRateLimiter(
+                    connection, shard.drip_id, getattr(settings, "DRIP_SEND_RATE", None)
+                ),
+            )
+        finally:
+            _release_slot(connection, shard_id)
+    finally:
+        connection.delete(lock)
+
+    DripRun.objects.finish_parent(shard.parent_id, now=conditional_now)
+    return count
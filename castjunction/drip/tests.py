@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 
 from django.test import TestCase
+from django.core.cache import cache
 from django.test.client import RequestFactory
 from django.core.exceptions import ValidationError
 from django.core.urlresolvers import resolve, reverse
@@ -8,9 +9,10 @@ from django.core import mail
 from django.conf import settings
 from django.utils import timezone
 
-from drip.models import Drip, SentDrip, QuerySetRule
+from drip.models import Drip, SentDrip, QuerySetRule, DripRun
 from drip.drips import DripBase, DripMessage
-from drip.utils import get_user_model, unicode
+from drip import preview
+from drip.utils import get_user_model, unicode, explain_queryset, count_within
 
 from credits.models import Profile
 
@@ -50,6 +52,26 @@ class RulesTestCase(TestCase):
         )
         self.assertRaises(ValidationError, rule.clean)
 
+    def test_get_rules_follows_rule_changes(self):
+        cache.clear()
+        rule = QuerySetRule.objects.create(
+            drip=self.drip,
+            field_name="date_joined",
+            lookup_type="lte",
+            field_value="now-60 days",
+        )
+        # loaded before the edits, its lastchanged is stale.
+        drip = Drip.objects.get(id=self.drip.id)
+        self.assertEqual(["now-60 days"], [r.field_value for r in drip.get_rules()])
+
+        rule = QuerySetRule.objects.get(id=rule.id)
+        rule.field_value = "now-30 days"
+        rule.save()
+        self.assertEqual(["now-30 days"], [r.field_value for r in drip.get_rules()])
+
+        rule.delete()
+        self.assertEqual([], drip.get_rules())
+
 
 class DripsTestCase(TestCase):
     def setUp(self):
@@ -96,6 +118,18 @@ class DripsTestCase(TestCase):
     def test_users_exists(self):
         self.assertEqual(20, self.User.objects.all().count())
 
+    def test_explain_queryset(self):
+        plan = explain_queryset(self.User.objects.filter(username__contains="credits"))
+        self.assertIn("Plan Rows", plan)
+        self.assertIn("Node Type", plan)
+
+    def test_count_within(self):
+        self.assertEqual(20, count_within(self.User.objects.all(), 10000))
+        slow = self.User.objects.extra(where=["pg_sleep(0.05) IS NOT NULL"])
+        self.assertIsNone(count_within(slow, 10))
+        # the timeout is local to its savepoint, the connection is still usable.
+        self.assertEqual(20, self.User.objects.count())
+
     def test_day_zero_users(self):
         start = timezone.now() - timedelta(days=1)
         end = timezone.now()
@@ -383,6 +417,28 @@ class DripsTestCase(TestCase):
         # check that our admin (not excluded from test) is shown once.
         self.assertEqual(unicode(response.content).count(admin.email), 1)
 
+    def test_timeline_counts_each_user_once(self):
+        cache.clear()
+        model_drip = Drip.objects.create(
+            name="A Custom Week Ago",
+            subject_template="HELLO {{ user.username }}",
+            body_html_template="KETTEHS ROCK!",
+        )
+        QuerySetRule.objects.create(
+            drip=model_drip,
+            field_name="date_joined",
+            lookup_type="gte",
+            field_value=(timezone.now() - timedelta(days=1)).strftime(
+                "%Y-%m-%d 00:00:00"
+            ),
+        )
+
+        days = preview.timeline(model_drip, 3, 3)
+        # same 4 users match every day, they are only picked on the first.
+        self.assertEqual(4, days[0]["count"])
+        self.assertEqual(4, sum(day["count"] for day in days))
+        self.assertEqual(4, len(days[0]["users"]))
+
     ##################
     ### TEST M2M   ###
     ##################
@@ -562,3 +618,32 @@ class CustomMessagesTest(TestCase):
         self.assertEqual(1, len(mail.outbox))
         email = mail.outbox.pop()
         self.assertIsInstance(email, mail.EmailMessage)
+
+    def test_send_records_run(self):
+        result = self.model_drip.drip.send()
+        self.assertEqual(1, result)
+        self.assertEqual(1, SentDrip.objects.filter(drip=self.model_drip).count())
+        drip_run = DripRun.objects.get(drip=self.model_drip)
+        self.assertEqual(self.user.id, drip_run.cursor)
+        self.assertEqual(1, drip_run.sent)
+        self.assertIsNotNone(drip_run.finished)
+
+    def test_finish_parent_waits_for_every_shard(self):
+        parent = DripRun.objects.create(drip=self.model_drip)
+        first = DripRun.objects.create(drip=self.model_drip, parent=parent, sent=2)
+        second = DripRun.objects.create(drip=self.model_drip, parent=parent, sent=3)
+        DripRun.objects.filter(id=first.id).update(finished=timezone.now())
+        self.assertFalse(DripRun.objects.finish_parent(parent.id))
+        self.assertIsNone(DripRun.objects.get(id=parent.id).finished)
+
+        DripRun.objects.filter(id=second.id).update(finished=timezone.now())
+        self.assertTrue(DripRun.objects.finish_parent(parent.id))
+        parent = DripRun.objects.get(id=parent.id)
+        self.assertEqual(5, parent.sent)
+        self.assertIsNotNone(parent.finished)
+
+    def test_interrupted_run_resumes_after_cursor(self):
+        DripRun.objects.create(drip=self.model_drip, cursor=self.user.id)
+        result = self.model_drip.drip.send()
+        self.assertEqual(0, result)
+        self.assertEqual(0, len(mail.outbox))
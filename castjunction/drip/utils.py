@@ -1,6 +1,7 @@
+import json
 import sys
 
-from django.db import models
+from django.db import connections, models, transaction, OperationalError
 from django.db.models import ForeignKey, OneToOneField, ManyToManyField
 from django.db.models.fields.related import ForeignObjectRel
 
@@ -136,3 +137,37 @@ def get_user_model():
     except ImportError:
         from django.contrib.auth.models import User
     return User
+
+
+def explain_queryset(qs):
+    """
+    Return the planner's output for a queryset without executing it.
+
+    The estimated row count is read from postgres' JSON plan.
+    """
+    sql, params = qs.query.sql_with_params()
+    connection = connections[qs.db]
+    with transaction.atomic(using=qs.db):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+    if isinstance(plan, basestring):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def count_within(qs, timeout):
+    """
+    Return exact count of a queryset, or None if it takes over ``timeout`` ms.
+    """
+    connection = connections[qs.db]
+    try:
+        with transaction.atomic(using=qs.db):
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = %s", [int(timeout)])
+                count = qs.count()
+                # a released savepoint keeps the setting for the outer transaction.
+                cursor.execute("SET LOCAL statement_timeout = DEFAULT")
+            return count
+    except OperationalError:
+        return None
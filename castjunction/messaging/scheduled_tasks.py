@@ -1,18 +1,28 @@
 """Scheduled tasks."""
+from collections import defaultdict
 from datetime import datetime, timedelta
 
+# number of digest mails delivered over one smtp connection.
+DIGEST_BATCH_SIZE = 500
+
 
 def broadcast_approved_jobs():
-    """Test."""
+    """Send every talent one digest of approved jobs matching their profile.
+
+    Matching is done per job against the eligibility index, talent are then
+    grouped by their set of matching jobs so the digest is rendered once per
+    distinct job set and delivered in batches by background workers.
+    """
     import django
 
     django.setup()
     import pytz
     from project.models import Job
-    from users.models import Person
+    from users.models import Person, EligibilityIndex
     from utils import choices
     from django.conf import settings as django_settings
     from .mails import JobApprovedEmailNotification
+    from .tasks import send_job_digest_batch, DIGEST_FIRST_NAME_PLACEHOLDER
 
     # Fetch all approved jobs from 10 AM IST(i.e 4.30 UTC)
     # yesterday and  to 10 AM IST (i.e 4.30 UTC) today.
@@ -30,26 +40,48 @@ def broadcast_approved_jobs():
     )
     yesterday = today - timedelta(days=1)
 
-    all_jobs = Job.objects.filter(status="A", updated_at__range=(yesterday, today))
-    all_users = Person.objects.filter(preference__email_notification=True)
+    all_jobs = list(
+        Job.objects.filter(
+            status=choices.APPROVED, updated_at__range=(yesterday, today)
+        ).order_by("id")
+    )
+    if not all_jobs:
+        return
+
+    matching_jobs = defaultdict(list)
+    for job in all_jobs:
+        person_ids = EligibilityIndex.objects.matching(job).values_list(
+            "person_id", flat=True
+        )
+        for person_id in person_ids.iterator():
+            matching_jobs[person_id].append(job)
+
+    recipients = defaultdict(list)
+    all_users = (
+        Person.objects.filter(preference__email_notification=True)
+        .exclude(email=None)
+        .values_list("id", "email", "first_name")
+    )
+    for user_id, email, first_name in all_users.iterator():
+        jobs = matching_jobs.get(user_id)
+        if jobs:
+            recipients[tuple(jobs)].append((user_id, email, first_name))
 
-    if all_jobs:
-        for gender, _ in choices.GENDER_CHOICES:
-            filtered_jobs = all_jobs.filter(
-                required_gender__in=[gender, choices.NOT_SPECIFIED]
+    # checkpoint key, a rerun on the same day skips users already mailed.
+    digest_key = "job_digest:{}".format(today.date().isoformat())
+    for jobs, users in recipients.items():
+        context = {
+            "job_count": len(jobs),
+            "jobs": jobs,
+            "domain": django_settings.DOMAIN,
+            "url": django_settings.JOB_OPPORTUNITIES_URL,
+            "first_name": DIGEST_FIRST_NAME_PLACEHOLDER,
+        }
+        notification = JobApprovedEmailNotification(receiver=[], context=context)
+        for start in range(0, len(users), DIGEST_BATCH_SIZE):
+            send_job_digest_batch.delay(
+                digest_key,
+                notification.subject,
+                notification.body,
+                users[start : start + DIGEST_BATCH_SIZE],
             )
-            if filtered_jobs:
-                filtered_users = list(
-                    all_users.filter(gender=gender)
-                    .exclude(email=None)
-                    .values_list("email", flat=True)
-                )
-                context = {
-                    "job_count": filtered_jobs.count(),
-                    "jobs": filtered_jobs,
-                    "domain": django_settings.DOMAIN,
-                    "url": django_settings.JOB_OPPORTUNITIES_URL,
-                }
-                JobApprovedEmailNotification(
-                    receiver=filtered_users, context=context
-                ).send()
@@ -1,13 +1,23 @@
 """Message related tasks."""
 import urllib
 
+import django_rq
 from django_rq import job
 from django.core.mail import EmailMessage
 from django.core.mail import get_connection
 from django.conf import settings as django_settings
+from django.utils.html import escape
 
 from actstream import action
 
+# GCM accepts at most 1000 registration ids per multicast request.
+PUSH_CHUNK_SIZE = 1000
+# sent chunks are remembered for three days to resume failed fan-outs.
+PUSH_PROGRESS_TIMEOUT = 60 * 60 * 24 * 3
+# digest body is rendered once per job set, user's name is filled in later.
+DIGEST_FIRST_NAME_PLACEHOLDER = "__digest_first_name__"
+DIGEST_PROGRESS_TIMEOUT = 60 * 60 * 24 * 2
+
 
 @job("default")
 def send_mail(
@@ -56,6 +66,42 @@ def send_mass_html_mail(
     return connection.send_messages(messages)
 
 
+@job("default")
+def send_job_digest_batch(digest_key, subject, body, recipients):
+    """Deliver a batch of rendered job digest over a single connection.
+
+    ``recipients`` is a list of ``(user_id, email, first_name)``. Users
+    already recorded under ``digest_key`` are skipped so a retried batch does
+    not mail them twice.
+    """
+    connection = django_rq.get_connection("default")
+    pipeline = connection.pipeline()
+    for user_id, email, first_name in recipients:
+        pipeline.sismember(digest_key, user_id)
+    already_sent = pipeline.execute()
+    pending = [
+        recipient
+        for recipient, sent in zip(recipients, already_sent)
+        if not sent
+    ]
+    if not pending:
+        return 0
+    sender = getattr(django_settings, "STAGEROUTE_EMAIL", None)
+    datatuple = tuple(
+        (
+            subject,
+            body.replace(DIGEST_FIRST_NAME_PLACEHOLDER, escape(first_name or "")),
+            sender,
+            [email],
+        )
+        for user_id, email, first_name in pending
+    )
+    sent = send_mass_html_mail(datatuple)
+    connection.sadd(digest_key, *[user_id for user_id, _, _ in pending])
+    connection.expire(digest_key, DIGEST_PROGRESS_TIMEOUT)
+    return sent
+
+
 def send_push_notification(user, message, **kwargs):
     """Send push notification to user."""
     from push_notifications.models import GCMDevice
@@ -70,16 +116,96 @@ def send_push_notification(user, message, **kwargs):
         pass
 
 
+def _push_progress_key(fanout_key):
+    """Return redis key holding chunks already sent for a fan-out."""
+    return "push_fanout:{}:done".format(fanout_key)
+
+
+def _push_bound_key(fanout_key):
+    """Return redis key holding the last device id of a fan-out."""
+    return "push_fanout:{}:bound".format(fanout_key)
+
+
+def fan_out_push_notification(fanout_key, users, message, **kwargs):
+    """Stream active devices of users and enqueue one send task per chunk.
+
+    ``users`` is a queryset of user ids, it is evaluated here and never
+    pickled into redis. Chunk ``n`` holds the devices with an id in
+    ``(n * PUSH_CHUNK_SIZE, (n + 1) * PUSH_CHUNK_SIZE]``, up to the last device
+    id seen by the first attempt of ``fanout_key``. A retried fan-out walks
+    the same ranges whatever devices were added or removed meanwhile, and
+    ranges already recorded as sent are not enqueued again.
+    """
+    from push_notifications.models import GCMDevice
+
+    connection = django_rq.get_connection("default")
+    progress_key = _push_progress_key(fanout_key)
+    bound_key = _push_bound_key(fanout_key)
+    last_id = GCMDevice.objects.order_by("-id").values_list("id", flat=True).first()
+    connection.set(bound_key, last_id or 0, nx=True, ex=PUSH_PROGRESS_TIMEOUT)
+    device_ids = (
+        GCMDevice.objects.filter(
+            user__in=users, active=True, id__lte=int(connection.get(bound_key))
+        )
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+    def enqueue(index, chunk):
+        if not chunk or connection.sismember(progress_key, index):
+            return 0
+        send_push_notification_chunk.delay(fanout_key, index, chunk, message, **kwargs)
+        return 1
+
+    chunks = 0
+    index = None
+    chunk = []
+    for device_id in device_ids.iterator():
+        device_index = (device_id - 1) // PUSH_CHUNK_SIZE
+        if device_index != index:
+            chunks += enqueue(index, chunk)
+            index = device_index
+            chunk = []
+        chunk.append(device_id)
+    chunks += enqueue(index, chunk)
+    return chunks
+
+
 @job("default")
-def bulk_send_push_notification(users, message, **kwargs):
-    """Send push notification to user."""
+def send_push_notification_chunk(fanout_key, index, device_ids, message, **kwargs):
+    """Send push notification to one chunk of devices and record progress."""
     from push_notifications.models import GCMDevice
 
+    connection = django_rq.get_connection("default")
+    progress_key = _push_progress_key(fanout_key)
+    if connection.sismember(progress_key, index):
+        return "chunk already sent"
+    GCMDevice.objects.filter(id__in=device_ids, active=True).send_message(
+        message, **kwargs
+    )
+    connection.sadd(progress_key, index)
+    connection.expire(progress_key, PUSH_PROGRESS_TIMEOUT)
+    return "sent to %s devices" % len(device_ids)
+
+
+@job("default")
+def send_job_approved_push_notification(job_id, message, **kwargs):
+    """Send push notification to talent eligible for an approved job."""
+    from project.models import Job
+    from users.models import EligibilityIndex
+
     try:
-        devices = GCMDevice.objects.filter(user__in=users, active=True)
-        devices.send_message(message, **kwargs)
-    except GCMDevice.DoesNotExist:
-        pass
+        job = Job.objects.get(id=job_id)
+    except Job.DoesNotExist:
+        return None
+    users = (
+        EligibilityIndex.objects.matching(job)
+        .filter(push_notification=True)
+        .values("person_id")
+    )
+    return fan_out_push_notification(
+        "job_approved_{}".format(job_id), users, message, **kwargs
+    )
 
 
 def send_app_notification(sender, verb, action_object, target, description):
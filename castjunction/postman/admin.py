@@ -9,7 +9,7 @@ except ImportError:
     from django.contrib.sites.models import get_current_site
 from django.utils.translation import ugettext, ugettext_lazy as _
 
-from postman.models import Message, PendingMessage
+from postman.models import Message, PendingMessage, search_messages
 
 
 class MessageAdminForm(forms.ModelForm):
@@ -113,6 +113,12 @@ class MessageAdmin(admin.ModelAdmin):
         "moderation_status",
     )
     list_filter = ("moderation_status",)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Use the full-text index instead of scanning subjects and bodies."""
+        if not search_term:
+            return queryset, False
+        return search_messages(queryset, search_term), False
     fieldsets = (
         (
             None,
@@ -17,10 +17,15 @@ for e in events:
         subject='New {0} at Our School: {1}'.format(e.type, e.title),
         body=e.description)
 """
+
 from __future__ import unicode_literals
 import json
 
-from django.db.models import Q
+import django_rq
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.query import QuerySet
 
 from django.contrib.sites.models import Site
 from django.contrib.auth import get_user_model
@@ -33,12 +38,17 @@ from rest_framework.response import Response
 from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
 
-from postman.models import Message, STATUS_PENDING, STATUS_ACCEPTED
+from postman.models import Conversation, Message, STATUS_PENDING, STATUS_ACCEPTED
+from utils.pagination import KeysetPaginationMixin, SentAtKeysetPagination
 from actstream import action
 from messaging.tasks import send_push_notification
 from messaging.messages import POSTMAN_REPLY_MESSAGE
 
-from .models import get_order_by
+from . import OPTION_MESSAGES
+from .models import SEARCH_KEY, get_order_by, search_messages
+
+# number of messages inserted by one query of pm_broadcast()
+BROADCAST_BATCH_SIZE = 500
 
 
 def _get_site():
@@ -46,7 +56,9 @@ def _get_site():
     return Site.objects.get_current() if Site._meta.installed else None
 
 
-def pm_broadcast(sender, recipients, subject, body="", skip_notification=False):
+def pm_broadcast(
+    sender, recipients, subject, body="", skip_notification=False, set_thread=False
+):
     """
     Broadcast a message to multiple Users.
 
@@ -54,27 +66,101 @@ def pm_broadcast(sender, recipients, subject, body="", skip_notification=False):
     and deleted on the sender side.
     The message is expected to be issued from a trusted application, so moderation
     is not necessary and the status is automatically set to 'accepted'.
+    Messages are inserted in batches and, if the setting
+    POSTMAN_ASYNC_BROADCAST_NOTIFICATION is set, recipients are notified by one
+    background job enqueued once the messages are committed.
 
-    Optional argument:
+    Optional arguments:
         ``skip_notification``: if the normal notification event is not wished
+        ``set_thread``: to make each message the root of its own conversation
     """
-    message = Message(
-        subject=subject,
-        body=body,
-        sender=sender,
-        sender_archived=True,
-        sender_deleted_at=now(),
-        moderation_status=STATUS_ACCEPTED,
-        moderation_date=now(),
-    )
-    if not isinstance(recipients, (tuple, list)):
+    if isinstance(recipients, QuerySet):
+        recipients = list(recipients)
+    elif not isinstance(recipients, (tuple, list)):
         recipients = (recipients,)
-    for recipient in recipients:
-        message.recipient = recipient
-        message.pk = None
-        message.save()
-        if not skip_notification:
-            message.notify_users(STATUS_PENDING, _get_site())
+    sent_at = now()
+    messages = [
+        Message(
+            subject=subject,
+            body=body,
+            sender=sender,
+            recipient=recipient,
+            sent_at=sent_at,
+            sender_archived=True,
+            sender_deleted_at=sent_at,
+            moderation_status=STATUS_ACCEPTED,
+            moderation_date=sent_at,
+        )
+        for recipient in recipients
+    ]
+    message_ids = _bulk_insert(messages, set_thread)
+    if not skip_notification:
+        if getattr(settings, "POSTMAN_ASYNC_BROADCAST_NOTIFICATION", False):
+            # the worker must find the messages, and none after a rollback.
+            transaction.on_commit(
+                lambda: django_rq.get_queue("default").enqueue(
+                    notify_broadcast, message_ids
+                )
+            )
+        else:
+            notify_broadcast(message_ids)
+    return messages
+
+
+def pm_bulk_write(sender, messages, set_thread=False):
+    """
+    Write personal messages from a User to many Users at once.
+
+    Contrary to pm_broadcast(), each message has its own subject and body and
+    stays in the sent folder of the sender. Messages are accepted and no
+    notification is sent, as for an application-issued pm_write().
+
+    Arguments:
+        ``messages``: a list of (recipient, subject, body)
+        ``set_thread``: to make each message the root of its own conversation
+    """
+    sent_at = now()
+    messages = [
+        Message(
+            subject=subject,
+            body=body,
+            sender=sender,
+            recipient=recipient,
+            sent_at=sent_at,
+            moderation_status=STATUS_ACCEPTED,
+            moderation_date=sent_at,
+        )
+        for recipient, subject, body in messages
+    ]
+    _bulk_insert(messages, set_thread)
+    return messages
+
+
+def _bulk_insert(messages, set_thread):
+    """Insert messages by batches and keep folders and counters up to date."""
+    Message.objects.bulk_create(messages, batch_size=BROADCAST_BATCH_SIZE)
+    message_ids = [message.pk for message in messages]
+    if set_thread:
+        Message.objects.filter(pk__in=message_ids).update(thread=F("pk"))
+        for message in messages:
+            message.thread_id = message.pk
+    Conversation.objects.refresh(message_ids)
+    Message.objects.adjust_unread_count(
+        [message.recipient_id for message in messages], 1
+    )
+    return message_ids
+
+
+def notify_broadcast(message_ids):
+    """
+    Notify the recipients of broadcast messages.
+    """
+    site = _get_site()
+    messages = Message.objects.filter(pk__in=message_ids).select_related(
+        "sender", "recipient", "parent"
+    )
+    for message in messages.iterator():
+        message.notify_users(STATUS_PENDING, site)
 
 
 def pm_write(
@@ -87,6 +173,7 @@ def pm_write(
     auto_delete=False,
     auto_moderators=None,
     set_thread=False,
+    parent=None,
 ):
     """
     Write a message to a User.
@@ -101,10 +188,14 @@ def pm_write(
         ``auto_archive``: to mark the message as archived on the sender side
         ``auto_delete``: to mark the message as deleted on the sender side
         ``auto_moderators``: a list of auto-moderation functions
+        ``parent``: the message replied to, the new one joins its conversation
     """
     if subject is None or subject == "":
         raise ValidationError("Subject can not be blank")
     message = Message(subject=subject, body=body, sender=sender, recipient=recipient)
+    if parent:
+        message.parent = parent
+        message.thread_id = parent.thread_id
     initial_status = message.moderation_status
     if auto_moderators:
         message.auto_moderate(auto_moderators)
@@ -118,7 +209,8 @@ def pm_write(
     message.save()
     if set_thread:
         message.thread = message
-    message.save()
+        Message.objects.filter(pk=message.pk).update(thread=message)
+        Conversation.objects.refresh([message.pk])
     if not skip_notification:
         action.send(
             recipient, verb="got a new message.", description="Got the message."
@@ -135,10 +227,78 @@ class MessageSerializer(serializers.ModelSerializer):
         model = Message
 
 
-class InboxAPIView(mixins.ListModelMixin, viewsets.GenericViewSet):
+class MessageChangeSerializer(serializers.ModelSerializer):
+    """Compact representation of a changed message for delta sync."""
+
+    class Meta:
+        model = Message
+        fields = (
+            "id",
+            "thread",
+            "parent",
+            "sender",
+            "recipient",
+            "subject",
+            "sent_at",
+            "read_at",
+            "replied_at",
+            "sender_archived",
+            "recipient_archived",
+            "sender_deleted_at",
+            "recipient_deleted_at",
+            "change_seq",
+            "change_xid",
+        )
+
+
+class ChangesAPIView(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Messages of the user sent, read, archived or deleted after a cursor.
+
+    The client polls with the returned ``cursor`` as ``since`` and gets
+    ``has_more`` when it should ask again right away. A cursor reads
+    ``<change_xid>-<change_seq>`` and is opaque to clients.
+    """
+
+    serializer_class = MessageChangeSerializer
+    permission_classes = (IsAuthenticated,)
+    default_limit = 100
+    max_limit = 500
+
+    def list(self, request, *args, **kwargs):
+        cursor = request.query_params.get("since", "0-0")
+        try:
+            since = tuple(int(part) for part in cursor.split("-"))
+            limit = min(
+                int(request.query_params.get("limit", self.default_limit)),
+                self.max_limit,
+            )
+        except ValueError:
+            raise ValidationError("since must be a cursor and limit an integer.")
+        if len(since) != 2:
+            raise ValidationError("since must be a cursor and limit an integer.")
+        changes = list(Message.objects.changes(request.user, since)[: limit + 1])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        if changes:
+            cursor = "{0}-{1}".format(changes[-1].change_xid, changes[-1].change_seq)
+        serializer = self.get_serializer(changes, many=True)
+        return Response(
+            {
+                "cursor": cursor,
+                "has_more": has_more,
+                "results": serializer.data,
+            }
+        )
+
+
+class InboxAPIView(
+    KeysetPaginationMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
 
     folder_name = "inbox"
     serializer_class = MessageSerializer
+    keyset_pagination_class = SentAtKeysetPagination
 
     def list(self, request, *args, **kwargs):
         params = {}
@@ -148,9 +308,15 @@ class InboxAPIView(mixins.ListModelMixin, viewsets.GenericViewSet):
         order_by = get_order_by(self.request.GET)
         if order_by:
             params["order_by"] = order_by
+        terms = self.request.GET.get(SEARCH_KEY)
+        if terms:
+            # matching messages, rather than the last one of each conversation
+            params["option"] = OPTION_MESSAGES
         queryset = getattr(Message.objects, self.folder_name)(
             self.request.user, **params
         )
+        if terms:
+            queryset = search_messages(queryset, terms)
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -217,12 +383,8 @@ class ReplyAPIView(mixins.CreateModelMixin, viewsets.GenericViewSet):
             subject=parent_message.subject,
             body=body,
             skip_notification=True,
+            parent=parent_message,
         )
-
-        if parent_message:
-            reply.parent = parent_message
-            reply.thread_id = parent_message.thread_id
-        reply.save()
         # send reply notification to sender.
         action.send(
             parent_message.sender,
@@ -1,30 +1,46 @@
 from __future__ import unicode_literals
+import time
 from datetime import timedelta
-from optparse import make_option
 
-from django.core.management.base import NoArgsCommand
-from django.db.models import Max, Count, F, Q
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max, Min, Count, F, Q
 from django.utils.timezone import now
 
-from postman.models import Message
+from postman.models import Conversation, Message
 
 
-class Command(NoArgsCommand):
+class Command(BaseCommand):
     help = """Can be run as a cron job or directly to clean out old data from the database:
   Messages or conversations marked as deleted by both sender and recipient,
   more than a minimal number of days ago."""
-    option_list = NoArgsCommand.option_list + (
-        make_option(
+
+    def add_arguments(self, parser):
+        parser.add_argument(
             "-d",
             "--days",
-            type="int",
+            type=int,
             default=30,
             help="The minimal number of days a message is kept marked as deleted, "
-            "before to be considered for real deletion [default: %default]",
-        ),
-    )
+            "before to be considered for real deletion [default: %(default)s]",
+        )
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            default=0,
+            help="Erase by ranges of this number of message ids, each one in its own "
+            "short transaction, instead of all at once [default: %(default)s]",
+        )
+        parser.add_argument(
+            "--max-seconds",
+            type=int,
+            default=0,
+            help="In batch mode, stop after this duration, to be resumed by the next run "
+            "[default: %(default)s, no limit]",
+        )
 
-    def handle_noargs(self, **options):
+    def handle(self, *args, **options):
         verbose = int(options.get("verbosity"))
         days = options.get("days")
         date = now() - timedelta(days=days)
@@ -32,6 +48,10 @@ class Command(NoArgsCommand):
             self.stdout.write(
                 "Erase messages and conversations marked as deleted before %s\n" % date
             )
+        if options.get("batch_size"):
+            return self.erase_in_batches(
+                date, options["batch_size"], options.get("max_seconds"), verbose
+            )
         # for a conversation to be candidate, all messages must satisfy the criteria
         tpks = (
             Message.objects.filter(thread__isnull=False)
@@ -55,3 +75,62 @@ class Command(NoArgsCommand):
                 recipient_deleted_at__lte=date,
             )
         ).delete()
+
+    def erase_in_batches(self, date, batch_size, max_seconds, verbose):
+        """
+        Erase candidates by ranges of conversation keys.
+
+        A conversation is erased as a whole, its messages only refer to each
+        other and to its summary rows, so rows are deleted without loading them.
+
+        """
+        bounds = Message.objects.aggregate(low=Min("pk"), high=Max("pk"))
+        if bounds["low"] is None:
+            return
+        started = time.time()
+        erased = 0
+        for low in range(bounds["low"], bounds["high"] + 1, batch_size):
+            if max_seconds and time.time() - started > max_seconds:
+                if verbose >= 1:
+                    self.stdout.write("Time is up, stopped before id %s\n" % low)
+                break
+            key_range = (low, low + batch_size - 1)
+            tpks = list(
+                Message.objects.filter(thread__range=key_range)
+                .values("thread")
+                .annotate(
+                    cnt=Count("pk"),
+                    s_max=Max("sender_deleted_at"),
+                    s_cnt=Count("sender_deleted_at"),
+                    r_max=Max("recipient_deleted_at"),
+                    r_cnt=Count("recipient_deleted_at"),
+                )
+                .order_by()
+                .filter(
+                    s_cnt=F("cnt"), r_cnt=F("cnt"), s_max__lte=date, r_max__lte=date
+                )
+                .values_list("thread", flat=True)
+            )
+            pks = list(
+                Message.objects.filter(
+                    pk__range=key_range,
+                    thread__isnull=True,
+                    sender_deleted_at__lte=date,
+                    recipient_deleted_at__lte=date,
+                ).values_list("pk", flat=True)
+            )
+            if not (tpks or pks):
+                continue
+            with transaction.atomic(), connection.cursor() as cursor:
+                Conversation.objects.filter(thread_key__in=tpks + pks).delete()
+                cursor.execute(
+                    "DELETE FROM postman_message WHERE thread_id = ANY(%s) OR id = ANY(%s)",
+                    [tpks, pks],
+                )
+                rows = cursor.rowcount
+            erased += rows
+            if verbose >= 1:
+                self.stdout.write(
+                    "Ids %s to %s: %s messages erased, %s in total\n"
+                    % (key_range[0], key_range[1], rows, erased)
+                )
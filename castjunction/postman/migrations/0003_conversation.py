@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.conf import settings
+import django.db.models.deletion
+
+
+def get_message_folders(message):
+    """Copy of postman.models.get_message_folders as of this migration."""
+    folders = set()
+    sender_id, recipient_id = message['sender_id'], message['recipient_id']
+    if recipient_id and message['moderation_status'] == 'a':
+        if message['recipient_deleted_at'] is not None:
+            folders.add((recipient_id, 'trash'))
+        elif message['recipient_archived']:
+            folders.add((recipient_id, 'archives'))
+        else:
+            folders.add((recipient_id, 'inbox'))
+    if sender_id:
+        if message['sender_deleted_at'] is not None:
+            folders.add((sender_id, 'trash'))
+        elif message['sender_archived']:
+            folders.add((sender_id, 'archives'))
+        else:
+            folders.add((sender_id, 'sent'))
+    return folders
+
+
+def fill_conversations(apps, schema_editor):
+    """Summarize existing messages by user, folder and conversation."""
+    Message = apps.get_model('postman', 'Message')
+    Conversation = apps.get_model('postman', 'Conversation')
+    summaries = {}
+    messages = Message.objects.order_by('pk').values(
+        'pk', 'thread_id', 'sender_id', 'recipient_id', 'sent_at', 'read_at', 'sender_archived',
+        'recipient_archived', 'sender_deleted_at', 'recipient_deleted_at', 'moderation_status')
+    for message in messages.iterator():
+        thread_key = message['thread_id'] or message['pk']
+        for user_id, folder in get_message_folders(message):
+            summary = summaries.setdefault((user_id, folder, thread_key), {'count': 0, 'unread_count': 0})
+            # ordered by pk, the last one seen is the latest
+            summary['last'] = message
+            if message['thread_id']:
+                summary['count'] += 1
+            if message['recipient_id'] == user_id and message['read_at'] is None:
+                summary['unread_count'] += 1
+    Conversation.objects.bulk_create([
+        Conversation(
+            user_id=user_id, folder=folder, thread_key=thread_key, last_message_id=summary['last']['pk'],
+            last_sent_at=summary['last']['sent_at'], count=summary['count'], unread_count=summary['unread_count'])
+        for (user_id, folder, thread_key), summary in summaries.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('postman', '0002_auto_message_sent_at_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('folder', models.CharField(choices=[('inbox', 'Inbox'), ('sent', 'Sent'), ('archives', 'Archives'), ('trash', 'Trash')], max_length=10)),
+                ('thread_key', models.IntegerField(help_text='Id of the root message, or of the message if not in a thread.')),
+                ('last_sent_at', models.DateTimeField()),
+                ('count', models.IntegerField(default=0)),
+                ('unread_count', models.IntegerField(default=0)),
+                ('last_message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to='postman.Message')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postman_conversations', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='conversation',
+            unique_together=set([('user', 'folder', 'thread_key')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='conversation',
+            index_together=set([('user', 'folder', 'last_sent_at')]),
+        ),
+        migrations.RunPython(fill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.conf import settings
+
+
+# every insert or update takes the next value, so clients can ask for changes after a cursor
+CHANGE_SEQ_SQL = """
+CREATE SEQUENCE postman_message_change_seq;
+CREATE OR REPLACE FUNCTION postman_message_set_change_seq() RETURNS trigger AS $$
+BEGIN
+    NEW.change_seq := nextval('postman_message_change_seq');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER postman_message_change_seq BEFORE INSERT OR UPDATE ON postman_message
+    FOR EACH ROW EXECUTE PROCEDURE postman_message_set_change_seq();
+"""
+
+BATCH_SIZE = 10000
+
+DROP_CHANGE_SEQ_SQL = """
+DROP TRIGGER postman_message_change_seq ON postman_message;
+DROP FUNCTION postman_message_set_change_seq();
+DROP SEQUENCE postman_message_change_seq;
+"""
+
+
+def fill_change_seq(apps, schema_editor):
+    """Number existing messages by id ranges, each batch committed on its own."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT max(id) FROM postman_message')
+        last_id = cursor.fetchone()[0] or 0
+        for lower in range(0, last_id, BATCH_SIZE):
+            # the trigger numbers every updated row
+            cursor.execute(
+                'UPDATE postman_message SET change_seq = NULL WHERE id > %s AND id <= %s',
+                [lower, lower + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('postman', '0003_conversation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CHANGE_SEQ_SQL, DROP_CHANGE_SEQ_SQL),
+        migrations.RunPython(fill_change_seq, migrations.RunPython.noop),
+        migrations.AlterIndexTogether(
+            name='message',
+            index_together=set([('recipient', 'sent_at'), ('sender', 'sent_at'), ('recipient', 'change_seq'), ('sender', 'change_seq')]),
+        ),
+    ]
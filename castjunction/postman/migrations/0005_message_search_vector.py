@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, transaction
+
+
+SEARCH_VECTOR_SQL = """
+ALTER TABLE postman_message ADD COLUMN search_vector tsvector;
+CREATE OR REPLACE FUNCTION postman_message_set_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.subject, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.body, '')), 'B');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER postman_message_search_vector BEFORE INSERT OR UPDATE OF subject, body ON postman_message
+    FOR EACH ROW EXECUTE PROCEDURE postman_message_set_search_vector();
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER postman_message_search_vector ON postman_message;
+DROP FUNCTION postman_message_set_search_vector();
+ALTER TABLE postman_message DROP COLUMN search_vector;
+"""
+
+BATCH_SIZE = 10000
+
+
+def fill_search_vector(apps, schema_editor):
+    """Fill the vector of existing messages by id ranges, each batch committed on its own.
+
+    A backfill is not a change for delta sync clients, the change_seq trigger
+    is left out of each batch, and the table is only locked for that batch.
+    """
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT max(id) FROM postman_message')
+        last_id = cursor.fetchone()[0] or 0
+    for lower in range(0, last_id, BATCH_SIZE):
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute('ALTER TABLE postman_message DISABLE TRIGGER postman_message_change_seq')
+            cursor.execute(
+                "UPDATE postman_message SET search_vector ="
+                " setweight(to_tsvector('english', coalesce(subject, '')), 'A') ||"
+                " setweight(to_tsvector('english', coalesce(body, '')), 'B')"
+                " WHERE id > %s AND id <= %s",
+                [lower, lower + BATCH_SIZE])
+            cursor.execute('ALTER TABLE postman_message ENABLE TRIGGER postman_message_change_seq')
+
+
+class Migration(migrations.Migration):
+
+    # batches of the backfill and the index build do not hold one long lock.
+    atomic = False
+
+    dependencies = [
+        ('postman', '0004_message_change_seq'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY postman_message_search_vector_gin ON postman_message USING gin (search_vector)',
+            'DROP INDEX postman_message_search_vector_gin',
+        ),
+    ]
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.conf import settings
+
+
+# sequence numbers are taken in write order, the writing transaction tells readers when a number is final
+CHANGE_XID_SQL = """
+CREATE OR REPLACE FUNCTION postman_message_set_change_seq() RETURNS trigger AS $$
+BEGIN
+    NEW.change_seq := nextval('postman_message_change_seq');
+    NEW.change_xid := txid_current();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+DROP_CHANGE_XID_SQL = """
+CREATE OR REPLACE FUNCTION postman_message_set_change_seq() RETURNS trigger AS $$
+BEGIN
+    NEW.change_seq := nextval('postman_message_change_seq');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('postman', '0005_message_search_vector'),
+    ]
+
+    operations = [
+        # existing rows were committed long ago, a constant default does not rewrite the table
+        migrations.AddField(
+            model_name='message',
+            name='change_xid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(CHANGE_XID_SQL, DROP_CHANGE_XID_SQL),
+        migrations.AlterIndexTogether(
+            name='message',
+            index_together=set([('recipient', 'sent_at'), ('sender', 'sent_at'), ('recipient', 'change_xid', 'change_seq'), ('sender', 'change_xid', 'change_seq')]),
+        ),
+    ]
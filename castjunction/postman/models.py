@@ -7,10 +7,12 @@ except ImportError:
     from django.utils.importlib import import_module  # Django 1.6 / py2.6
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.urlresolvers import reverse
-from django.db import models
-from django.db.models.query import QuerySet
+from django.db import connection, models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils import six
 from django.utils.encoding import force_text, python_2_unicode_compatible
 from django.utils.text import Truncator
@@ -18,7 +20,6 @@ from django.utils.timezone import now
 from django.utils.translation import ugettext, ugettext_lazy as _
 
 from . import OPTION_MESSAGES
-from .query import PostmanQuery
 from .utils import email_visitor, notify_user
 
 # moderation constants
@@ -30,6 +31,24 @@ STATUS_CHOICES = (
     (STATUS_ACCEPTED, _("Accepted")),
     (STATUS_REJECTED, _("Rejected")),
 )
+# folder constants
+FOLDER_INBOX = "inbox"
+FOLDER_SENT = "sent"
+FOLDER_ARCHIVES = "archives"
+FOLDER_TRASH = "trash"
+FOLDER_CHOICES = (
+    (FOLDER_INBOX, _("Inbox")),
+    (FOLDER_SENT, _("Sent")),
+    (FOLDER_ARCHIVES, _("Archives")),
+    (FOLDER_TRASH, _("Trash")),
+)
+# first key of the advisory locks on conversations, the second is the thread key
+CONVERSATION_LOCK_CLASS = 7301
+# cache key of the number of unread messages of a user
+UNREAD_COUNT_CACHE_KEY = "postman:unread_count:{0}"
+# full-text search, the search_vector column is kept by a trigger, see migration 0005
+SEARCH_KEY = "q"
+SEARCH_CONFIG = "english"
 # ordering constants
 ORDER_BY_KEY = "o"  # as 'order'
 ORDER_BY_FIELDS = {}  # setting is deferred in setup()
@@ -82,6 +101,22 @@ def get_order_by(query_dict):
             return order_by_field
 
 
+def search_messages(queryset, terms):
+    """
+    Filter messages on a full-text search of their subject and body.
+
+    Argument:
+    ``terms``: the words typed by the user, all of them are to be found
+
+    """
+    return queryset.extra(
+        where=[
+            "postman_message.search_vector @@ plainto_tsquery(%s::regconfig, %s)"
+        ],
+        params=[SEARCH_CONFIG, terms],
+    )
+
+
 def get_user_representation(user):
     """
     Return a User representation for display, configurable through an optional setting.
@@ -118,53 +153,62 @@ def get_user_name(user):
     return user.get_username()  # default
 
 
+def get_message_folders(message):
+    """
+    Return the set of (user id, folder) a message is listed in.
+
+    Mirror of the filters of the MessageManager folders, applied to a
+    values() dict of a message.
+
+    """
+    folders = set()
+    sender_id, recipient_id = message["sender_id"], message["recipient_id"]
+    accepted = message["moderation_status"] == STATUS_ACCEPTED
+    if recipient_id and accepted:
+        if message["recipient_deleted_at"] is not None:
+            folders.add((recipient_id, FOLDER_TRASH))
+        elif message["recipient_archived"]:
+            folders.add((recipient_id, FOLDER_ARCHIVES))
+        else:
+            folders.add((recipient_id, FOLDER_INBOX))
+    if sender_id:
+        if message["sender_deleted_at"] is not None:
+            folders.add((sender_id, FOLDER_TRASH))
+        elif message["sender_archived"]:
+            folders.add((sender_id, FOLDER_ARCHIVES))
+        else:
+            folders.add((sender_id, FOLDER_SENT))
+    return folders
+
+
 class MessageManager(models.Manager):
     """The manager for Message."""
 
-    def _folder(self, related, filters, option=None, order_by=None):
+    def _folder(self, user, folder, related, filters, option=None, order_by=None):
         """Base code, in common to the folders."""
-        qs = (
-            self.all()
-            if option == OPTION_MESSAGES
-            else QuerySet(self.model, PostmanQuery(self.model), using=self._db)
-        )
+        qs = self.all()
         if related:
             qs = qs.select_related(*related)
         if order_by:
             qs = qs.order_by(order_by)
-        if isinstance(filters, (list, tuple)):
-            lookups = models.Q()
-            for filter in filters:
-                lookups |= models.Q(**filter)
-        else:
-            lookups = models.Q(**filters)
         if option == OPTION_MESSAGES:
+            if isinstance(filters, (list, tuple)):
+                lookups = models.Q()
+                for filter in filters:
+                    lookups |= models.Q(**filter)
+            else:
+                lookups = models.Q(**filters)
             return qs.filter(lookups)
             # Adding a 'count' attribute, to be similar to the by-conversation case,
             # should not be necessary. Otherwise add:
             # .extra(select={'count': 'SELECT 1'})
         else:
-            qs = qs.extra(
-                select={"count": "{0}.count".format(qs.query.pm_alias_prefix)}
-            )
-            qs.query.pm_set_extra(
-                table=(
-                    # extra columns are always first in the SELECT query
-                    # for tests with the version 2.4.1 of sqlite3 in py26, add to the select: , 'id': 'postman_message.id'
-                    self.filter(lookups, thread_id__isnull=True)
-                    .extra(select={"count": 0})
-                    .values_list("id", "count")
-                    .order_by(),
-                    # use separate annotate() to keep control of the necessary order
-                    self.filter(lookups, thread_id__isnull=False)
-                    .values("thread")
-                    .annotate(count=models.Count("pk"))
-                    .annotate(id=models.Max("pk"))
-                    .values_list("id", "count")
-                    .order_by(),
-                )
-            )
-            return qs
+            # one summary row per conversation points to its latest message,
+            # see Conversation.
+            return qs.filter(
+                conversations__user=user,
+                conversations__folder=folder,
+            ).annotate(count=models.F("conversations__count"))
 
     def inbox(self, user, related=True, **kwargs):
         """
@@ -177,20 +221,46 @@ class MessageManager(models.Manager):
             "recipient_deleted_at__isnull": True,
             "moderation_status": STATUS_ACCEPTED,
         }
-        return self._folder(related, filters, **kwargs)
+        return self._folder(user, FOLDER_INBOX, related, filters, **kwargs)
 
     def inbox_unread_count(self, user):
         """
         Return the number of unread messages for a user.
 
         Designed for context_processors.py and templatetags/postman_tags.py
+        The counter is kept in the cache and adjusted on write, it is counted
+        again from the database once expired, see POSTMAN_UNREAD_COUNT_TIMEOUT.
 
         """
-        return (
-            self.inbox(user, related=False, option=OPTION_MESSAGES)
-            .filter(read_at__isnull=True)
-            .count()
-        )
+        key = UNREAD_COUNT_CACHE_KEY.format(user.pk)
+        count = cache.get(key)
+        if count is None:
+            count = (
+                self.inbox(user, related=False, option=OPTION_MESSAGES)
+                .filter(read_at__isnull=True)
+                .count()
+            )
+            cache.set(
+                key, count, getattr(settings, "POSTMAN_UNREAD_COUNT_TIMEOUT", 15 * 60)
+            )
+        return count
+
+    def adjust_unread_count(self, user_ids, delta):
+        """
+        Add ``delta`` to the cached unread counters of some users.
+
+        A counter not in cache is left alone, it is counted on next read.
+
+        """
+        for user_id in user_ids:
+            try:
+                cache.incr(UNREAD_COUNT_CACHE_KEY.format(user_id), delta)
+            except ValueError:
+                pass
+
+    def reset_unread_count(self, user_ids):
+        """Drop cached unread counters, to count them again on next read."""
+        cache.delete_many([UNREAD_COUNT_CACHE_KEY.format(pk) for pk in user_ids])
 
     def sent(self, user, **kwargs):
         """
@@ -203,7 +273,7 @@ class MessageManager(models.Manager):
             "sender_deleted_at__isnull": True,
             # allow to see pending and rejected messages as well
         }
-        return self._folder(related, filters, **kwargs)
+        return self._folder(user, FOLDER_SENT, related, filters, **kwargs)
 
     def archives(self, user, **kwargs):
         """
@@ -223,7 +293,7 @@ class MessageManager(models.Manager):
                 "sender_deleted_at__isnull": True,
             },
         )
-        return self._folder(related, filters, **kwargs)
+        return self._folder(user, FOLDER_ARCHIVES, related, filters, **kwargs)
 
     def trash(self, user, **kwargs):
         """
@@ -241,7 +311,7 @@ class MessageManager(models.Manager):
                 "sender_deleted_at__isnull": False,
             },
         )
-        return self._folder(related, filters, **kwargs)
+        return self._folder(user, FOLDER_TRASH, related, filters, **kwargs)
 
     def thread(self, user, filter):
         """
@@ -269,6 +339,32 @@ class MessageManager(models.Manager):
         """
         return self.filter(filter, sender=user)  # any status is fine
 
+    def changes(self, user, since=(0, 0)):
+        """
+        Return messages of a user created or updated after a change cursor.
+
+        The cursor is a (change_xid, change_seq) pair. Sequence numbers are
+        taken in the order transactions write, not the order they commit,
+        so only changes of transactions older than any one still running
+        are returned: nothing can later commit behind the cursor.
+
+        """
+        return (
+            self.filter(
+                (models.Q(recipient=user) & models.Q(moderation_status=STATUS_ACCEPTED))
+                | models.Q(sender=user)
+            )
+            .extra(
+                where=[
+                    "(postman_message.change_xid, postman_message.change_seq) > (%s, %s)",
+                    "postman_message.change_xid"
+                    " < txid_snapshot_xmin(txid_current_snapshot())",
+                ],
+                params=list(since),
+            )
+            .order_by("change_xid", "change_seq")
+        )
+
     def perms(self, user):
         """
         Return a field-lookups filter as a permission controller for a reply request.
@@ -286,12 +382,18 @@ class MessageManager(models.Manager):
         """
         Set messages as read.
         """
-        return self.filter(
+        qs = self.filter(
             filter,
             recipient=user,
             moderation_status=STATUS_ACCEPTED,
             read_at__isnull=True,
-        ).update(read_at=now())
+        )
+        thread_keys = Conversation.objects.thread_keys(qs)
+        rows = qs.update(read_at=now())
+        if rows:
+            self.adjust_unread_count([user.pk], -rows)
+            Conversation.objects.refresh(thread_keys)
+        return rows
 
 
 @python_2_unicode_compatible
@@ -361,6 +463,9 @@ class Message(models.Model):
     moderation_reason = models.CharField(
         _("rejection reason"), max_length=120, blank=True
     )
+    # set by a database trigger on every insert or update, see migrations 0004 and 0006
+    change_seq = models.BigIntegerField(null=True, editable=False)
+    change_xid = models.BigIntegerField(default=0, editable=False)
 
     objects = MessageManager()
 
@@ -368,6 +473,12 @@ class Message(models.Model):
         verbose_name = _("message")
         verbose_name_plural = _("messages")
         ordering = ["-sent_at", "-id"]
+        index_together = (
+            ("recipient", "sent_at"),
+            ("sender", "sent_at"),
+            ("recipient", "change_xid", "change_seq"),
+            ("sender", "change_xid", "change_seq"),
+        )
 
     def __str__(self):
         return "{0}>{1}:{2}".format(
@@ -685,3 +796,160 @@ class PendingMessage(Message):
     def set_rejected(self):
         """Set the message as rejected."""
         self.moderation_status = STATUS_REJECTED
+
+
+class ConversationManager(models.Manager):
+    """The manager for Conversation."""
+
+    def thread_keys(self, messages):
+        """
+        Return the conversation keys of a queryset of messages.
+
+        The key is the id of the thread root, or the id of the message itself
+        for a message out of any thread.
+
+        """
+        return set(
+            thread_id or pk for pk, thread_id in messages.values_list("pk", "thread_id")
+        )
+
+    def refresh(self, thread_keys):
+        """
+        Rebuild the summary rows of some conversations from their messages.
+
+        A conversation is small, so its rows are recomputed as a whole rather
+        than adjusted in place.
+
+        """
+        thread_keys = set(thread_keys)
+        if not thread_keys:
+            return
+        with transaction.atomic():
+            self._lock(thread_keys)
+            self._rebuild(thread_keys)
+
+    def _lock(self, thread_keys):
+        """
+        Serialize refreshes of the same conversations until commit.
+
+        Locks are taken in key order, so two refreshes can not deadlock, and
+        messages are read only once the locks are held.
+
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(%s, key) FROM"
+                " (SELECT unnest(%s::integer[]) AS key ORDER BY 1) AS keys",
+                [CONVERSATION_LOCK_CLASS, sorted(thread_keys)],
+            )
+
+    def _rebuild(self, thread_keys):
+        messages = Message.objects.filter(
+            models.Q(thread__in=thread_keys)
+            | models.Q(pk__in=thread_keys, thread__isnull=True)
+        ).values(
+            "pk",
+            "thread_id",
+            "sender_id",
+            "recipient_id",
+            "sent_at",
+            "read_at",
+            "sender_archived",
+            "recipient_archived",
+            "sender_deleted_at",
+            "recipient_deleted_at",
+            "moderation_status",
+        )
+        summaries = {}
+        for message in messages:
+            thread_key = message["thread_id"] or message["pk"]
+            for user_id, folder in get_message_folders(message):
+                summary = summaries.setdefault(
+                    (user_id, folder, thread_key),
+                    {"last": message, "count": 0, "unread_count": 0},
+                )
+                if message["thread_id"]:
+                    summary["count"] += 1
+                if message["recipient_id"] == user_id and message["read_at"] is None:
+                    summary["unread_count"] += 1
+                if message["pk"] > summary["last"]["pk"]:
+                    summary["last"] = message
+        self.filter(thread_key__in=thread_keys).delete()
+        self.bulk_create(
+            [
+                self.model(
+                    user_id=user_id,
+                    folder=folder,
+                    thread_key=thread_key,
+                    last_message_id=summary["last"]["pk"],
+                    last_sent_at=summary["last"]["sent_at"],
+                    count=summary["count"],
+                    unread_count=summary["unread_count"],
+                )
+                for (user_id, folder, thread_key), summary in summaries.items()
+            ]
+        )
+
+
+@python_2_unicode_compatible
+class Conversation(models.Model):
+    """
+    Summary of a conversation, as listed in one folder of a user.
+
+    Maintained on write, so that folders are read without aggregating
+    the whole message history of the user.
+
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="postman_conversations"
+    )
+    folder = models.CharField(max_length=10, choices=FOLDER_CHOICES)
+    thread_key = models.IntegerField(
+        help_text="Id of the root message, or of the message if not in a thread."
+    )
+    last_message = models.ForeignKey(Message, related_name="conversations")
+    last_sent_at = models.DateTimeField()
+    count = models.IntegerField(default=0)
+    unread_count = models.IntegerField(default=0)
+
+    objects = ConversationManager()
+
+    class Meta:
+        unique_together = ("user", "folder", "thread_key")
+        index_together = (("user", "folder", "last_sent_at"),)
+
+    def __str__(self):
+        return "{0} {1} {2}".format(self.user_id, self.folder, self.thread_key)
+
+
+@receiver(post_save, sender=Message, dispatch_uid="postman.message.conversation")
+@receiver(post_save, sender=PendingMessage, dispatch_uid="postman.pending.conversation")
+@receiver(post_delete, sender=Message, dispatch_uid="postman.delete.conversation")
+def refresh_conversation(sender, instance, **kwargs):
+    """
+    Keep the conversation of a saved or deleted message up to date.
+
+    The key of the message itself is refreshed too, so a message moved into
+    a thread does not leave its former summary rows behind.
+
+    """
+    Conversation.objects.refresh([instance.thread_id or instance.pk, instance.pk])
+
+
+@receiver(post_save, sender=Message, dispatch_uid="postman.message.unread_count")
+@receiver(post_save, sender=PendingMessage, dispatch_uid="postman.pending.unread_count")
+@receiver(post_delete, sender=Message, dispatch_uid="postman.delete.unread_count")
+def update_unread_count(sender, instance, created=False, **kwargs):
+    """Count a new unread message, or recount after any other change."""
+    if not instance.recipient_id:
+        return
+    if not created:
+        Message.objects.reset_unread_count([instance.recipient_id])
+    elif (
+        instance.is_accepted()
+        and instance.read_at is None
+        and not instance.recipient_archived
+        and instance.recipient_deleted_at is None
+    ):
+        Message.objects.adjust_unread_count([instance.recipient_id], 1)
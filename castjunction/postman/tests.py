@@ -42,13 +42,16 @@ from django.contrib.auth import get_user_model, REDIRECT_FIELD_NAME
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.sites.models import Site
 from django.core import mail
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.core.urlresolvers import (
     reverse,
     clear_url_caches,
     get_resolver,
     get_urlconf,
 )
+from django.db import transaction
 from django.db.models import Q
 from django.http import QueryDict
 from django.template import Template, Context, TemplateSyntaxError, TemplateDoesNotExist
@@ -59,15 +62,19 @@ from django.utils import six
 from django.utils.six.moves import reload_module
 from django.utils.timezone import localtime, now
 from django.utils.translation import activate, deactivate
+from rest_framework.test import APIRequestFactory, force_authenticate
 
 from . import OPTION_MESSAGES
-from .api import pm_broadcast, pm_write
+from .api import ReplyAPIView, pm_broadcast, pm_write
 
 # because of reload()'s, do "from postman.fields import CommaSeparatedUserField" just before needs
 # because of reload()'s, do "from postman.forms import xxForm" just before needs
 from .models import (
     ORDER_BY_KEY,
     ORDER_BY_MAPPER,
+    Conversation,
+    FOLDER_ARCHIVES,
+    FOLDER_INBOX,
     Message,
     PendingMessage,
     STATUS_PENDING,
@@ -76,6 +83,7 @@ from .models import (
     get_order_by,
     get_user_representation,
     get_user_name,
+    search_messages,
 )
 
 # because of reload()'s, do "from postman.utils import notification" just before needs
@@ -119,6 +127,43 @@ class TransactionViewTest(TransactionTestCase):
         self.assertTrue(Message.objects.get())
 
 
+class ChangesTest(TransactionTestCase):
+    """
+    Test the changes after a cursor.
+    Changes are only final once their transaction committed, so Django TestCase can't be used.
+    """
+
+    def setUp(self):
+        cache.clear()  # unread counters
+        self.user1 = get_user_model().objects.create_user(
+            "foo", "foo@domain.com", "pass"
+        )
+        self.user2 = get_user_model().objects.create_user(
+            "bar", "bar@domain.com", "pass"
+        )
+        self.user3 = get_user_model().objects.create_user(
+            "baz", "baz@domain.com", "pass"
+        )
+
+    def test_changes(self):
+        m1 = pm_write(self.user1, self.user2, "s1", skip_notification=True)
+        m2 = pm_write(self.user2, self.user1, "s2", skip_notification=True)
+        changes = list(Message.objects.changes(self.user2))
+        self.assertListEqual(changes, [m1, m2])
+        cursor = (changes[-1].change_xid, changes[-1].change_seq)
+        self.assertListEqual(list(Message.objects.changes(self.user2, cursor)), [])
+        Message.objects.set_read(self.user2, Q(pk=m1.pk))
+        self.assertListEqual(list(Message.objects.changes(self.user2, cursor)), [m1])
+        self.assertListEqual(list(Message.objects.changes(self.user3)), [])
+
+    def test_running_transaction(self):
+        "Test that changes of a transaction still running are held back."
+        with transaction.atomic():
+            m1 = pm_write(self.user1, self.user2, "s1", skip_notification=True)
+            self.assertListEqual(list(Message.objects.changes(self.user2)), [])
+        self.assertListEqual(list(Message.objects.changes(self.user2)), [m1])
+
+
 # @override_settings(ROOT_URLCONF='postman.urls_for_tests')  not usable for test_template() ; ticket/26427
 class BaseTest(TestCase):
     """
@@ -145,10 +190,12 @@ class BaseTest(TestCase):
             "POSTMAN_SHOW_USER_AS",
             "POSTMAN_NAME_USER_AS",
             "POSTMAN_QUICKREPLY_QUOTE_BODY",
+            "POSTMAN_ASYNC_BROADCAST_NOTIFICATION",
         ):
             if hasattr(settings, a):
                 delattr(settings, a)
         settings.POSTMAN_MAILER_APP = None
+        cache.clear()  # unread counters
         settings.POSTMAN_AUTOCOMPLETER_APP = {
             "arg_default": "postman_single_as1-1",  # no default, mandatory to enable the feature
         }
@@ -1459,6 +1506,68 @@ class MessageManagerTest(BaseTest):
             list(qs.filter(recipient_id=2)), [m]
         )  # param 2, must stay at the end
 
+    def test_conversation(self):
+        "Test the maintenance of the conversation summaries."
+        m1 = self.c12()
+        m1.thread = m1
+        m1.save()
+        m2 = self.c21(parent=m1, thread=m1)
+        m3 = self.c12(parent=m2, thread=m1)
+        inbox = Conversation.objects.get(user=self.user2, folder=FOLDER_INBOX)
+        self.assertEqual(inbox.thread_key, m1.pk)
+        self.assertEqual(inbox.last_message_id, m3.pk)
+        self.assertEqual((inbox.count, inbox.unread_count), (2, 2))
+        self.assertEqual(Message.objects.inbox(self.user2)[0].count, 2)
+        Message.objects.set_read(self.user2, Q(thread=m1))
+        inbox = Conversation.objects.get(user=self.user2, folder=FOLDER_INBOX)
+        self.assertEqual(inbox.unread_count, 0)
+        Message.objects.as_recipient(self.user2, Q(thread=m1)).update(
+            recipient_archived=True
+        )
+        Conversation.objects.refresh([m1.pk])
+        self.assertFalse(Message.objects.inbox(self.user2).exists())
+        archives = Conversation.objects.get(user=self.user2, folder=FOLDER_ARCHIVES)
+        self.assertEqual(archives.last_message_id, m3.pk)
+
+    def test_unread_count_cache(self):
+        "Test the write-through maintenance of the cached unread counter."
+        self.assertEqual(Message.objects.inbox_unread_count(self.user2), 0)
+        m = self.c12()
+        pm_broadcast(self.user1, [self.user2], "s", skip_notification=True)
+        with self.assertNumQueries(0):
+            self.assertEqual(Message.objects.inbox_unread_count(self.user2), 2)
+        Message.objects.set_read(self.user2, Q(pk=m.pk))
+        with self.assertNumQueries(0):
+            self.assertEqual(Message.objects.inbox_unread_count(self.user2), 1)
+
+    def test_cleanup(self):
+        "Test the postman_cleanup command, by batches and at once."
+        old = now() - timedelta(days=40)
+        m1 = self.c12(sender_deleted_at=old, recipient_deleted_at=old)
+        m2 = self.c12(sender_deleted_at=old)
+        m3 = self.c12(sender_deleted_at=old, recipient_deleted_at=old)
+        m3.thread = m3
+        m3.save()
+        m4 = self.c21(
+            parent=m3, thread=m3, sender_deleted_at=old, recipient_deleted_at=now()
+        )
+        call_command("postman_cleanup", batch_size=2, verbosity=0)
+        pks = Message.objects.order_by("pk").values_list("pk", flat=True)
+        self.assertListEqual(list(pks.all()), [m2.pk, m3.pk, m4.pk])
+        self.assertFalse(Conversation.objects.filter(thread_key=m1.pk).exists())
+        Message.objects.filter(pk=m4.pk).update(recipient_deleted_at=old)
+        call_command("postman_cleanup", verbosity=0)
+        self.assertListEqual(list(pks.all()), [m2.pk])
+
+    def test_search_messages(self):
+        "Test the full-text search of messages."
+        m1 = self.c12(body="Audition for the lead role")
+        self.c12(body="Please sign the contract")
+        self.c13(body="Auditions are open")
+        qs = Message.objects.inbox(self.user2, option=OPTION_MESSAGES)
+        self.assertListEqual(list(search_messages(qs, "auditions")), [m1])
+        self.assertListEqual(list(search_messages(qs, "audition contract")), [])
+
     def test(self):
         """
               user1       user2
@@ -2635,6 +2744,23 @@ class ApiTest(BaseTest):
         self.assertEqual(m.sender, self.user1)
         self.assertEqual(m.recipient.get_username(), recipient_username)
 
+    def test_reply_api(self):
+        "Test that a reply is listed once, as the last message of its conversation."
+        m1 = self.c12()
+        request = APIRequestFactory().post("/", {"body": "b"})
+        force_authenticate(request, user=self.user2)
+        response = ReplyAPIView.as_view({"post": "create"})(request, message_id=m1.pk)
+        self.assertEqual(response.status_code, 200)
+        m1 = Message.objects.get(pk=m1.pk)
+        reply = Message.objects.get(pk=response.data["id"])
+        self.assertEqual(reply.parent, m1)
+        self.assertEqual(reply.thread, m1)
+        self.assertListEqual(list(Message.objects.inbox(self.user1)), [reply])
+        self.assertListEqual(list(Message.objects.sent(self.user2)), [reply])
+        self.assertEqual(Message.objects.inbox(self.user1)[0].count, 2)
+        self.assertEqual(Conversation.objects.filter(thread_key=reply.pk).count(), 0)
+        self.assertEqual(Message.objects.inbox_unread_count(self.user1), 1)
+
     def test_pm_broadcast(self):
         "Test the case of a single recipient."
         pm_broadcast(sender=self.user1, recipients=self.user2, subject="s", body="b")
@@ -2673,6 +2799,18 @@ class ApiTest(BaseTest):
         self.check_message(msgs[0], recipient_username="baz")
         self.check_message(msgs[1])
 
+    def test_pm_broadcast_set_thread(self):
+        "Test each broadcast message starting its own conversation."
+        pm_broadcast(
+            sender=self.user1,
+            recipients=[self.user2, self.user3],
+            subject="s",
+            set_thread=True,
+            skip_notification=True,
+        )
+        for m in Message.objects.all():
+            self.assertEqual(m.thread_id, m.pk)
+
     def test_pm_write(self):
         "Test the basic minimal use."
         pm_write(sender=self.user1, recipient=self.user2, subject="s", body="b")
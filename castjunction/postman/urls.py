@@ -107,7 +107,13 @@ from .views import (
     UndeleteView,
 )
 
-from .api import InboxAPIView, WriteAPIView, ReplyAPIView, ConversationAPIView
+from .api import (
+    InboxAPIView,
+    WriteAPIView,
+    ReplyAPIView,
+    ConversationAPIView,
+    ChangesAPIView,
+)
 
 urlpatterns = [
     url(r"^sent/(?:(?P<option>" + OPTIONS + ")/)?$", SentView.as_view(), name="sent"),
@@ -143,6 +149,9 @@ urlpatterns = [
         name="conversation_thread",
     ),
     url(r"^api/write/", WriteAPIView.as_view({"post": "create"}), name="write_api"),
+    url(
+        r"^api/changes/$", ChangesAPIView.as_view({"get": "list"}), name="changes_api"
+    ),
     url(
         r"^inbox/(?:(?P<option>" + OPTIONS + ")/)?$", InboxView.as_view(), name="inbox"
     ),
@@ -32,7 +32,7 @@ from django.views.generic import FormView, TemplateView, View
 from . import OPTION_MESSAGES
 from .fields import autocompleter_app
 from .forms import WriteForm, AnonymousWriteForm, QuickReplyForm, FullReplyForm
-from .models import Message, get_order_by
+from .models import Conversation, Message, get_order_by
 from .utils import format_subject, format_body
 
 login_required_m = method_decorator(login_required)
@@ -479,6 +479,9 @@ class UpdateMessageMixin(object):
         if pks or tpks:
             user = request.user
             filter = Q(pk__in=pks) | Q(thread__in=tpks)
+            thread_keys = Conversation.objects.thread_keys(
+                Message.objects.filter(filter)
+            )
             recipient_rows = Message.objects.as_recipient(user, filter).update(
                 **{"recipient_{0}".format(self.field_bit): self.field_value}
             )
@@ -487,6 +490,9 @@ class UpdateMessageMixin(object):
             )
             if not (recipient_rows or sender_rows):
                 raise Http404  # abnormal enough, like forged ids
+            Conversation.objects.refresh(thread_keys)
+            if recipient_rows:
+                Message.objects.reset_unread_count([user.pk])
             messages.success(request, self.success_msg, fail_silently=True)
             return redirect(request.GET.get("next") or self.success_url or next_url)
         else:
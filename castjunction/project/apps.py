@@ -13,6 +13,8 @@ class ProjectConfig(AppConfig):
 
         import django_rq
         from messaging.scheduled_tasks import broadcast_approved_jobs
+        from application.tasks import events_queue_name, process_application_events
+        from .tasks import close_expired_jobs
 
         scheduler = django_rq.get_scheduler("default")
         # Delete any existing jobs in the scheduler when the app starts up
@@ -23,3 +25,15 @@ class ProjectConfig(AppConfig):
             func=broadcast_approved_jobs,  # Function to be queued
             queue_name=scheduler.queue_name,
         )
+        # retries failed application events and catches up missed wake ups.
+        scheduler.cron(
+            cron_string="* * * * *",
+            func=process_application_events,
+            queue_name=events_queue_name(),
+        )
+        # closes jobs past their submission deadline with their applications.
+        scheduler.cron(
+            cron_string="5 * * * *",
+            func=close_expired_jobs,
+            queue_name=scheduler.queue_name,
+        )
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from datetime import date
+import json
+
+from django.db import migrations
+
+
+def close_expired_jobs(apps, schema_editor):
+    """Close approved jobs already past their submission deadline.
+
+    Status history is written too, pre_save of Job reads its last entry.
+    """
+    Job = apps.get_model('project', 'Job')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    FieldHistory = apps.get_model('field_history', 'FieldHistory')
+    job_ids = list(
+        Job.objects.filter(status='A', submission_deadline__lt=date.today()).values_list('id', flat=True)
+    )
+    Job.objects.filter(id__in=job_ids).update(status='C')
+    content_type, __ = ContentType.objects.get_or_create(app_label='project', model='job')
+    FieldHistory.objects.bulk_create(
+        [
+            FieldHistory(
+                object_id=job_id,
+                content_type=content_type,
+                field_name='status',
+                serialized_data=json.dumps([{'model': 'project.job', 'pk': job_id, 'fields': {'status': 'C'}}]),
+            )
+            for job_id in job_ids
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('field_history', '0002_auto_20160413_1824'),
+        ('project', '0006_auto_job_status_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='job',
+            index_together=set([('status', 'created_at'), ('status', 'submission_deadline')]),
+        ),
+        migrations.RunPython(close_expired_jobs, migrations.RunPython.noop),
+    ]
@@ -192,6 +192,13 @@ class Job(CommonFieldsMixin):
     audios = GenericRelation(Audio, related_query_name=related_query_name)
     objects = hstore.HStoreManager()
 
+    class Meta:
+        """Meta options."""
+
+        # backs the newest-first job listings and their cursor pagination,
+        # and the sweep closing expired jobs.
+        index_together = (("status", "created_at"), ("status", "submission_deadline"))
+
     def __unicode__(self):
         """unicode."""
         return self.title
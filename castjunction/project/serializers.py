@@ -2,6 +2,7 @@
 import json
 
 from django.contrib.contenttypes.models import ContentType
+from django.db import models
 from drf_extra_fields.fields import IntegerRangeField, FloatRangeField, DateRangeField
 
 from rest_framework import serializers
@@ -16,6 +17,7 @@ from application.models import State
 
 # from .search_indexes import JobIndex
 from .models import Job, Group, Key
+from .utils import prefetch_job_relations
 
 
 class DynamicFieldsModelSerializer(serializers.ModelSerializer):
@@ -66,6 +68,22 @@ class GroupSerializer(serializers.Field):
         return group
 
 
+class JobListSerializer(serializers.ListSerializer):
+    """Serialize a page of jobs using lookups prefetched for the whole page."""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        jobs = list(iterable)
+        user = None
+        if "request" in self.context:
+            user = self.context["request"].user
+        self.child._prefetched = prefetch_job_relations(jobs, user)
+        try:
+            return super().to_representation(jobs)
+        finally:
+            self.child._prefetched = None
+
+
 class JobSerializer(DynamicFieldsModelSerializer):
     created_by = serializers.PrimaryKeyRelatedField(
         read_only=True, default=serializers.CurrentUserDefault()
@@ -124,6 +142,7 @@ class JobSerializer(DynamicFieldsModelSerializer):
             "budgets",
             "job_type",
         )
+        list_serializer_class = JobListSerializer
 
     def create(self, validated_data):
         return Job.objects.create(**validated_data)
@@ -135,6 +154,16 @@ class JobSerializer(DynamicFieldsModelSerializer):
         return obj.get_job_type_display()
 
     def get_application(self, obj):
+        prefetched = getattr(self, "_prefetched", None)
+        if prefetched is not None:
+            application = prefetched["applications"].get(obj.id)
+            if application is None or "request" not in self.context:
+                return None
+            from application.serializers import ApplicationSerializer
+
+            return ApplicationSerializer(
+                application, context={"request": self.context["request"]}
+            ).data
         try:
             if "request" in self.context:
                 request = self.context["request"]
@@ -156,6 +185,9 @@ class JobSerializer(DynamicFieldsModelSerializer):
             return None
 
     def get_likes(self, obj):
+        prefetched = getattr(self, "_prefetched", None)
+        if prefetched is not None:
+            return obj.id in prefetched["likes"]
         try:
             if "request" in self.context:
                 user = self.context["request"].user
@@ -184,12 +216,16 @@ class JobDetailSerializer(JobSerializer):
     class Meta:
         model = Job
         exclude = ("application",)
+        list_serializer_class = JobListSerializer
 
     def get_count(self, obj):
+        counters = {
+            counter.state: counter.count for counter in obj.application_counts.all()
+        }
         count = {}
-        count["applied"] = obj.applications.filter(state=State.APPLIED).count()
-        count["invited"] = obj.applications.filter(state=State.INVITED).count()
-        count["shortlisted"] = obj.applications.filter(state=State.SHORTLISTED).count()
+        count["applied"] = counters.get(State.APPLIED, 0)
+        count["invited"] = counters.get(State.INVITED, 0)
+        count["shortlisted"] = counters.get(State.SHORTLISTED, 0)
         return count
 
     def get_applicants(self, obj):
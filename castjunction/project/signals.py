@@ -1,8 +1,7 @@
 """Signal for jobs."""
 import json
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
 
+from django.db import transaction
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 
@@ -12,10 +11,9 @@ from users.utils import (
     get_user_incentive_plan,
     get_incetive_amount,
 )
-from users.models import Person
 from utils import choices
 from user_tokens.accounts_manager import credit_to_reimbursement_account
-from messaging.tasks import bulk_send_push_notification
+from messaging.tasks import send_job_approved_push_notification
 from messaging.messages import JOB_APPROVED_MESSAGE
 
 from .models import Job
@@ -49,34 +47,12 @@ def incentive_for_job_approved(sender, created, instance, **kwargs):
                 amount,
                 merchant_reference="job_post_{}".format(instance.id),
             )
-        # send push notification to users.
-        gender = instance.required_gender
-        if gender == choices.NOT_SPECIFIED:
-            users = Person.objects.all()
-        else:
-            users = Person.objects.filter(
-                gender__in=[gender, choices.NOT_SPECIFIED],
-                preference__push_notification=True,
-            )
-
-        if instance.ages:
-            lower_age = instance.ages.lower
-            upper_age = instance.ages.upper
-
-            birth_date_upper_limit = datetime.today() - relativedelta(
-                years=int(lower_age)
-            )
-            birth_date_lower_limit = datetime.today() - relativedelta(
-                years=int(upper_age)
-            )
-            users = users.filter(
-                date_of_birth__gte=birth_date_lower_limit.date()
-            ).filter(date_of_birth__lte=birth_date_upper_limit.date())
-
+        # push notifications are fanned out in chunks by background workers
+        # once the approval is committed.
         extra_data = {"extra": {"data": json.dumps({"job_id": instance.id})}}
-
-        bulk_send_push_notification(
-            users,
-            JOB_APPROVED_MESSAGE.format(**{"job_title": instance.title}),
-            **extra_data
+        message = JOB_APPROVED_MESSAGE.format(**{"job_title": instance.title})
+        transaction.on_commit(
+            lambda: send_job_approved_push_notification.delay(
+                instance.id, message, **extra_data
+            )
         )
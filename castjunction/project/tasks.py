@@ -0,0 +1,106 @@
+"""Background tasks for project app.
+
+Jobs past their submission deadline are closed by a scheduled sweep, so
+listings filter on the indexed status alone. Open applications of closed
+jobs are moved to ``job_closed`` by the same sweep.
+"""
+from datetime import date
+
+from django.contrib.contenttypes.models import ContentType
+from django.core import serializers
+from django.db import transaction
+from django.utils import timezone
+from field_history.models import FieldHistory
+from field_history.tracker import get_serializer_name
+
+from application.models import Application
+from application.transitions import bulk_transition
+from utils import choices
+
+from .models import Job
+
+JOB_CLOSE_BATCH_SIZE = 100
+APPLICATION_CLOSE_BATCH_SIZE = 500
+
+
+def close_expired_jobs(
+    batch_size=JOB_CLOSE_BATCH_SIZE, application_batch_size=APPLICATION_CLOSE_BATCH_SIZE
+):
+    """Close approved jobs whose submission deadline is over.
+
+    Jobs are closed by batches, each with one update in its own transaction,
+    then applications of every closed job still in an open state are closed.
+    Returns the number of closed jobs and applications.
+    """
+    today = date.today()
+    closed_jobs = 0
+    while True:
+        with transaction.atomic():
+            job_ids = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(status=choices.APPROVED, submission_deadline__lt=today)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not job_ids:
+                break
+            Job.objects.filter(id__in=job_ids).update(
+                status=choices.CLOSED, updated_at=timezone.now()
+            )
+            record_status_history(job_ids, choices.CLOSED)
+        closed_jobs += len(job_ids)
+    return closed_jobs, close_applications_of_closed_jobs(application_batch_size)
+
+
+def record_status_history(job_ids, status):
+    """Write the status history ``update()`` skipped for the given jobs.
+
+    ``change_job_state`` reads the last entry, without it a reopened job
+    would be taken for an edit of an approved one.
+    """
+    content_type = ContentType.objects.get_for_model(Job)
+    FieldHistory.objects.bulk_create(
+        FieldHistory(
+            object_id=job_id,
+            content_type=content_type,
+            field_name="status",
+            serialized_data=serializers.serialize(
+                get_serializer_name(),
+                [Job(id=job_id, status=status)],
+                fields=["status"],
+            ),
+        )
+        for job_id in job_ids
+    )
+
+
+def close_applications_of_closed_jobs(batch_size=APPLICATION_CLOSE_BATCH_SIZE):
+    """Move open applications of closed jobs to ``job_closed`` by batches.
+
+    Applications left behind by an interrupted sweep or a job closed by hand
+    are picked up too. Returns the number of closed applications.
+    """
+    # states job_closed transitions from.
+    open_states = list(Application.job_closed._django_fsm.transitions)
+    closed = 0
+    while True:
+        application_ids = list(
+            Application.objects.filter(
+                job__status=choices.CLOSED, state__in=open_states
+            )
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not application_ids:
+            break
+        changed, __ = bulk_transition(
+            Application.objects.filter(id__in=application_ids),
+            lambda application: "job_closed",
+            None,
+            lambda application: None,
+        )
+        if not changed:
+            # the batch changed state meanwhile, leave it to the next sweep.
+            break
+        closed += len(changed)
+    return closed
@@ -1,3 +1,44 @@
+"""Tests for project app."""
+
+from datetime import date, timedelta
+
 from django.test import TestCase
 
-# Create your tests here.
+from users.models import User
+from utils import choices
+
+from .models import Job
+from .tasks import close_expired_jobs
+
+
+class CloseExpiredJobsTest(TestCase):
+    """Sweep of jobs past their submission deadline."""
+
+    def setUp(self):
+        self.user = User.objects.create(
+            email="director@example.com", user_type=User.COMPANY
+        )
+
+    def test_reopen_swept_job(self):
+        job = Job.objects.create(
+            title="Lead",
+            created_by=self.user,
+            status=choices.APPROVED,
+            submission_deadline=date.today() - timedelta(days=1),
+        )
+        self.assertEqual((1, 0), close_expired_jobs())
+        job = Job.objects.get(id=job.id)
+        self.assertEqual(choices.CLOSED, job.status)
+
+        # reopening is not an edit of an approved job, it stays approved.
+        job.status = choices.APPROVED
+        job.submission_deadline = date.today() + timedelta(days=7)
+        job.save()
+        self.assertEqual(choices.APPROVED, Job.objects.get(id=job.id).status)
+        self.assertEqual(
+            [choices.APPROVED, choices.CLOSED, choices.APPROVED],
+            [
+                history.field_value
+                for history in job.get_status_history().order_by("id")
+            ],
+        )
@@ -1,5 +1,12 @@
 """Utilites for job."""
-from application.models import State
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import prefetch_related_objects
+
+from pinax.likes.models import Like
+
+from application.models import State, Application
+
+from .models import Job
 
 states_for_popular_jobs = [
     State.APPLIED,
@@ -13,3 +20,36 @@ states_for_popular_jobs = [
     State.ONHOLD,
     State.JOBCLOSED,
 ]
+
+
+def prefetch_job_relations(jobs, user=None):
+    """Load images, user's applications and likes for a page of jobs.
+
+    Returns a dict with ``applications`` (job id -> application) and
+    ``likes`` (set of liked job ids). Job images are attached to each job's
+    ``images`` relation so ``job.images.all()`` does not hit the database.
+    """
+    prefetched = {"applications": {}, "likes": set()}
+    if not jobs:
+        return prefetched
+    prefetch_related_objects(jobs, "images")
+
+    if user is None or user.is_anonymous():
+        return prefetched
+    job_ids = [job.id for job in jobs]
+    applications = (
+        Application.objects.filter(job_id__in=job_ids, user=user)
+        .select_related("user")
+        .prefetch_related("audition_invites")
+    )
+    prefetched["applications"] = {
+        application.job_id: application for application in applications
+    }
+    prefetched["likes"] = set(
+        Like.objects.filter(
+            sender=user,
+            receiver_content_type=ContentType.objects.get_for_model(Job),
+            receiver_object_id__in=job_ids,
+        ).values_list("receiver_object_id", flat=True)
+    )
+    return prefetched
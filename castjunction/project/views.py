@@ -29,9 +29,9 @@ from .serializers import JobSerializer, JobDetailSerializer
 from .utils import states_for_popular_jobs
 
 from psycopg2.extras import NumericRange
-from datetime import datetime
 from users.views import LikeViewSet
 from utils import choices
+from utils.pagination import KeysetPaginationMixin, CreatedAtKeysetPagination
 
 
 class JobFilter(django_filters.FilterSet):
@@ -96,13 +96,10 @@ class JobFilter(django_filters.FilterSet):
 
     def filter_status(self, queryset, value):
         if value:
+            # expired jobs are closed by project.tasks.close_expired_jobs.
             if value == choices.APPROVED:
                 queryset = queryset.filter(
-                    status=value, submission_deadline__gte=datetime.today()
-                )
-            elif value == choices.CLOSED:
-                queryset = queryset.filter(
-                    status=choices.APPROVED, submission_deadline__lte=datetime.today()
+                    status=value, submission_deadline__isnull=False
                 )
             else:
                 queryset = queryset.filter(status=value)
@@ -191,7 +188,7 @@ class JobFilter(django_filters.FilterSet):
         return queryset
 
 
-class JobViewSet(viewsets.ModelViewSet):
+class JobViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """Create, Update and retrieve jobs."""
 
     queryset = Job.objects.all()
@@ -204,6 +201,7 @@ class JobViewSet(viewsets.ModelViewSet):
     )
     filter_class = JobFilter
     search_fields = ("title", "role_position", "location__slug")
+    keyset_pagination_class = CreatedAtKeysetPagination
 
     def __init__(self, **kwargs):
         """Init method."""
@@ -234,10 +232,10 @@ class JobViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Return all approved jobs."""
-        jobs = Job.objects.all()
+        jobs = Job.objects.select_related("location", "group")
         if not self.kwargs.get("pk"):
             jobs = jobs.filter(
-                status=choices.APPROVED, submission_deadline__gte=datetime.today()
+                status=choices.APPROVED, submission_deadline__isnull=False
             ).order_by("-created_at")
             if not self.request.user.is_anonymous():
                 # if user is logged in, exclude his/her applied jobs.
@@ -320,7 +318,7 @@ class JobViewSet(viewsets.ModelViewSet):
         queryset = Job.objects.filter(
             featured=True,
             status=choices.APPROVED,
-            submission_deadline__gte=datetime.today(),
+            submission_deadline__isnull=False,
         ).order_by("-created_at")
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -338,7 +336,10 @@ class JobViewSet(viewsets.ModelViewSet):
         ordered = queryset.annotate(
             app=Sum(
                 Case(
-                    When(application__state__in=states_for_popular_jobs, then=1),
+                    When(
+                        application_count__state__in=states_for_popular_jobs,
+                        then="application_count__count",
+                    ),
                     default=0,
                     output_field=IntegerField(),
                 )
@@ -401,4 +402,6 @@ class UserJobsViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     ordering = ("-created_at",)
 
     def get_queryset(self):
-        return Job.objects.filter(created_by=self.request.user)
+        return Job.objects.filter(created_by=self.request.user).prefetch_related(
+            "application_counts"
+        )
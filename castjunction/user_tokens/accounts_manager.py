@@ -1,7 +1,12 @@
 """Managers for accounts."""
 import datetime
 from django.conf import settings as django_settings
-from oscar_accounts import models, facade
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from oscar_accounts import models, exceptions
 
 from oscar.core.loading import get_model
 
@@ -16,6 +21,166 @@ next_year = today + datetime.timedelta(days=365)
 
 Transfer = get_model("oscar_accounts", "Transfer")
 
+SINK_ACCOUNT = "sink_2016_no_limit"
+SOURCE_ACCOUNT = "source_2016_no_limit"
+# cache key of the id of a user's account of an account type.
+USER_ACCOUNT_CACHE_KEY = "user_tokens:account:{0}:{1}"
+USER_ACCOUNT_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+class AccountResolver(object):
+    """Find ids of ledger accounts without querying for them on every transfer.
+
+    Account types never change once created, they are kept in process. Ids
+    of system accounts are kept in process and ids of user accounts in the
+    cache. Only ids are kept, accounts are read once by ``transfer()`` with
+    the lock they need.
+    """
+
+    def __init__(self):
+        self._system_account_ids = {}
+        self._account_types = {}
+
+    def system_account_id(self, name):
+        """Return id of the no credit limit system account of that name."""
+        if name not in self._system_account_ids:
+            account_id = (
+                models.Account.objects.filter(name=name)
+                .values_list("id", flat=True)
+                .first()
+            )
+            if account_id is None:
+                account_id = create_no_limit_account(name).id
+            self._system_account_ids[name] = account_id
+        return self._system_account_ids[name]
+
+    def is_system_account(self, account_id):
+        """Return whether the id is the one of a resolved system account."""
+        return account_id in self._system_account_ids.values()
+
+    def account_type(self, name):
+        """Return the account type of that name, created if missing."""
+        if name not in self._account_types:
+            acc_typ, created = models.AccountType.objects.get_or_create(
+                path=name, depth=1, name=name
+            )
+            self._account_types[name] = acc_typ
+        return self._account_types[name]
+
+    def user_account_id(self, user, account_type):
+        """Return id of user's account of the account type name."""
+        acc_typ = self.account_type(account_type)
+        key = USER_ACCOUNT_CACHE_KEY.format(user.id, acc_typ.id)
+        account_id = cache.get(key)
+        if account_id is None:
+            account_id = models.Account.objects.values_list("id", flat=True).get(
+                primary_user=user, account_type=acc_typ
+            )
+            cache.set(key, account_id, USER_ACCOUNT_CACHE_TIMEOUT)
+        return account_id
+
+    def forget(self, account):
+        """Drop what is known about a deleted account."""
+        for name, account_id in list(self._system_account_ids.items()):
+            if account_id == account.id:
+                del self._system_account_ids[name]
+        if account.primary_user_id and account.account_type_id:
+            cache.delete(
+                USER_ACCOUNT_CACHE_KEY.format(
+                    account.primary_user_id, account.account_type_id
+                )
+            )
+
+
+resolver = AccountResolver()
+
+
+@receiver(
+    post_delete, sender=models.Account, dispatch_uid="user_tokens.forget_deleted"
+)
+def forget_deleted_account(sender, instance, **kwargs):
+    """Deleted accounts must not be resolved anymore."""
+    resolver.forget(instance)
+
+
+def transfer(
+    source_id,
+    destination_id,
+    amount,
+    user=None,
+    merchant_reference=None,
+    description=None,
+):
+    """Post a transfer between two accounts given by id.
+
+    This is oscar's ``Transfer.objects.create()`` without its contention:
+    only user accounts are read, locked in id order, so concurrent debits of
+    an account are checked one after the other against its real balance,
+    and their cached balance is moved by the amount instead of summed again.
+    System accounts have no credit limit and are shared by every transfer,
+    their rows are neither locked nor written and their balance is the sum
+    of their transactions.
+    """
+    if source_id == destination_id:
+        raise exceptions.AccountException(
+            "The source and destination accounts for a transfer "
+            "must be different."
+        )
+    if amount <= 0:
+        raise exceptions.InvalidAmount("Debits must use a positive amount")
+    account_ids = [
+        account_id
+        for account_id in (source_id, destination_id)
+        if not resolver.is_system_account(account_id)
+    ]
+    with transaction.atomic():
+        locked = {
+            account.id: account
+            for account in models.Account.objects.select_for_update()
+            .filter(id__in=account_ids)
+            .order_by("id")
+        }
+        if len(locked) != len(account_ids):
+            raise models.Account.DoesNotExist(
+                "Account of transfer does not exist anymore."
+            )
+        source = locked.get(source_id)
+        for account in locked.values():
+            if not account.is_open():
+                raise exceptions.ClosedAccount("Account has been closed")
+        if source is not None:
+            if not source.can_be_authorised_by(user):
+                raise exceptions.AccountException(
+                    "This user is not authorised to make transfers from "
+                    "this account"
+                )
+            if not source.is_debit_permitted(amount):
+                raise exceptions.InsufficientFunds(
+                    "Unable to debit %.2f from account #%d" % (amount, source.id)
+                )
+        posted = Transfer.objects.get_queryset().create(
+            source_id=source_id,
+            destination_id=destination_id,
+            amount=amount,
+            user=user,
+            merchant_reference=merchant_reference,
+            description=description,
+        )
+        for account_id, delta in ((source_id, -amount), (destination_id, amount)):
+            posted.transactions.create(account_id=account_id, amount=delta)
+            if account_id in locked:
+                models.Account.objects.filter(id=account_id).update(
+                    balance=F("balance") + delta
+                )
+        return posted
+
+
+def get_token_balance(user):
+    """Return balance of user's token account, read by primary key."""
+    return models.Account.objects.values_list("balance", flat=True).get(
+        pk=resolver.user_account_id(user, django_settings.TOKEN_ACCOUNT)
+    )
+
 
 def create_no_limit_account(name):
     """Create system wide no credit limit account."""
@@ -30,9 +195,7 @@ def create_no_limit_account(name):
 def create_limited_credit_account(user, account_type):
     """Create credi limited account for user."""
     try:
-        acc_typ, created = models.AccountType.objects.get_or_create(
-            path=account_type, depth=1, name=account_type
-        )
+        acc_typ = resolver.account_type(account_type)
         account = models.Account.objects.create(
             credit_limit=django_settings.ACCOUNTS_MAX_ACCOUNT_VALUE,
             primary_user=user,
@@ -54,21 +217,12 @@ def create_limited_credit_account(user, account_type):
 def debit_tokens_from_user(user, amount):
     """Tranfer from user account to sink account."""
     # staff_member = User.objects.get(username="staff")
-    no_credit_limit_account_sink = None
-    try:
-        no_credit_limit_account_sink = models.Account.objects.get(
-            name="sink_2016_no_limit"
-        )
-    except models.Account.DoesNotExist:
-        no_credit_limit_account_sink = create_no_limit_account("sink_2016_no_limit")
+    no_credit_limit_account_sink = resolver.system_account_id(SINK_ACCOUNT)
+    user_account = resolver.user_account_id(user, django_settings.TOKEN_ACCOUNT)
 
-    user_account = models.Account.objects.get(
-        primary_user=user, account_type__name=django_settings.TOKEN_ACCOUNT
-    )
-
-    trans = facade.transfer(
-        source=user_account,
-        destination=no_credit_limit_account_sink,
+    trans = transfer(
+        source_id=user_account,
+        destination_id=no_credit_limit_account_sink,
         amount=amount,
     )
 
@@ -81,21 +235,12 @@ def credit_tokens_for_user(user, amount):
     Ideally this wiil be called after payment success by user.
     """
     # staff_member = User.objects.get(username="staff")
-    no_credit_limit_account_source = None
-    try:
-        no_credit_limit_account_source = models.Account.objects.get(
-            name="source_2016_no_limit"
-        )
-    except models.Account.DoesNotExist:
-        no_credit_limit_account_source = create_no_limit_account("source_2016_no_limit")
-
-    user_account = models.Account.objects.get(
-        primary_user=user, account_type__name=django_settings.TOKEN_ACCOUNT
-    )
+    no_credit_limit_account_source = resolver.system_account_id(SOURCE_ACCOUNT)
+    user_account = resolver.user_account_id(user, django_settings.TOKEN_ACCOUNT)
 
-    trans = facade.transfer(
-        source=no_credit_limit_account_source,
-        destination=user_account,
+    trans = transfer(
+        source_id=no_credit_limit_account_source,
+        destination_id=user_account,
         amount=amount,
     )
 
@@ -103,22 +248,14 @@ def credit_tokens_for_user(user, amount):
 
 
 def credit_to_reimbursement_account(user, amount, merchant_reference=None):
-
-    no_credit_limit_account_source = None
-    try:
-        no_credit_limit_account_source = models.Account.objects.get(
-            name="source_2016_no_limit"
-        )
-    except models.Account.DoesNotExist:
-        no_credit_limit_account_source = create_no_limit_account("source_2016_no_limit")
-
-    user_account = models.Account.objects.get(
-        primary_user=user, account_type__name=django_settings.REIMBURSEMENT_ACCOUNT
+    no_credit_limit_account_source = resolver.system_account_id(SOURCE_ACCOUNT)
+    user_account = resolver.user_account_id(
+        user, django_settings.REIMBURSEMENT_ACCOUNT
     )
     if not Transfer.objects.filter(merchant_reference=merchant_reference).exists():
-        trans = facade.transfer(
-            source=no_credit_limit_account_source,
-            destination=user_account,
+        trans = transfer(
+            source_id=no_credit_limit_account_source,
+            destination_id=user_account,
             amount=amount,
             merchant_reference=merchant_reference,
         )
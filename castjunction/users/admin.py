@@ -10,6 +10,7 @@ from .models import (
     Company,
     PersonType,
     Bio,
+    PhysicalAttributes,
     Skill,
     Education,
     Institute,
@@ -104,6 +105,12 @@ class BioAdmin(admin.ModelAdmin):
     list_display = ("id", "person", "data")
 
 
+@admin.register(PhysicalAttributes)
+class PhysicalAttributesAdmin(admin.ModelAdmin):
+    list_display = ("person", "height", "waist", "hair_color", "body_type")
+    raw_id_fields = ("person",)
+
+
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
     list_display = ("skill_name",)
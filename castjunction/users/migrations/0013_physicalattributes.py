@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+NUMERIC_FIELDS = ('height', 'waist', 'shoulders', 'chest', 'hips', 'shoe_size')
+CHOICE_FIELDS = ('hair_color', 'eye_color', 'hair_style', 'hair_type', 'skin_type', 'body_type')
+
+
+def copy_bio_data(apps, schema_editor):
+    """Fill physical attributes from existing bio hstore data."""
+    Bio = apps.get_model('users', 'Bio')
+    PhysicalAttributes = apps.get_model('users', 'PhysicalAttributes')
+    batch = []
+    for person_id, data in Bio.objects.values_list('person_id', 'data').iterator():
+        data = data or {}
+        values = {}
+        for name in NUMERIC_FIELDS:
+            try:
+                values[name] = float(data.get(name))
+            except (TypeError, ValueError):
+                values[name] = None
+        for name in CHOICE_FIELDS:
+            values[name] = data.get(name) or None
+        batch.append(PhysicalAttributes(person_id=person_id, **values))
+        if len(batch) >= 1000:
+            PhysicalAttributes.objects.bulk_create(batch)
+            batch = []
+    PhysicalAttributes.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_user_date_joined_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhysicalAttributes',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('height', models.FloatField(blank=True, db_index=True, null=True)),
+                ('waist', models.FloatField(blank=True, db_index=True, null=True)),
+                ('shoulders', models.FloatField(blank=True, db_index=True, null=True)),
+                ('chest', models.FloatField(blank=True, db_index=True, null=True)),
+                ('hips', models.FloatField(blank=True, db_index=True, null=True)),
+                ('shoe_size', models.FloatField(blank=True, db_index=True, null=True)),
+                ('hair_color', models.CharField(blank=True, db_index=True, max_length=20, null=True)),
+                ('eye_color', models.CharField(blank=True, db_index=True, max_length=20, null=True)),
+                ('hair_style', models.CharField(blank=True, db_index=True, max_length=50, null=True)),
+                ('hair_type', models.CharField(blank=True, db_index=True, max_length=50, null=True)),
+                ('skin_type', models.CharField(blank=True, db_index=True, max_length=50, null=True)),
+                ('body_type', models.CharField(blank=True, db_index=True, max_length=50, null=True)),
+                ('person', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='physical_attributes', related_query_name='physical_attributes', to='users.Person')),
+            ],
+            options={
+                'verbose_name_plural': 'Physical attributes',
+            },
+        ),
+        migrations.RunPython(copy_bio_data, migrations.RunPython.noop),
+    ]
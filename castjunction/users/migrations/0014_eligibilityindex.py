@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+FILL_ELIGIBILITY_INDEX = """
+INSERT INTO users_eligibilityindex (
+    person_id, gender, date_of_birth, city_id, languages, push_notification,
+    height, hair_color, eye_color, hair_style, hair_type, skin_type, body_type
+)
+SELECT
+    p.user_ptr_id, p.gender, u.date_of_birth, u.city_id,
+    COALESCE((
+        SELECT array_agg(lower(l.language_name) ORDER BY lower(l.language_name))
+        FROM users_language_person lp
+        JOIN users_language l ON l.id = lp.language_id
+        WHERE lp.person_id = p.user_ptr_id AND l.language_name <> ''
+    ), '{}'),
+    COALESCE(pref.push_notification, true),
+    pa.height, pa.hair_color, pa.eye_color, pa.hair_style, pa.hair_type, pa.skin_type, pa.body_type
+FROM users_person p
+JOIN users_user u ON u.id = p.user_ptr_id
+LEFT JOIN users_userpreference pref ON pref.user_id = p.user_ptr_id
+LEFT JOIN users_physicalattributes pa ON pa.person_id = p.user_ptr_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cities', '0001_initial'),
+        ('users', '0013_physicalattributes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EligibilityIndex',
+            fields=[
+                ('person', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='eligibility', related_query_name='eligibility', serialize=False, to='users.Person')),
+                ('gender', models.CharField(choices=[('M', 'Male'), ('F', 'Female'), ('O', 'Other'), ('NS', 'Not_specified')], max_length=2)),
+                ('date_of_birth', models.DateField(blank=True, db_index=True, null=True)),
+                ('languages', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), blank=True, default=list, size=None)),
+                ('push_notification', models.BooleanField(default=True)),
+                ('height', models.FloatField(blank=True, db_index=True, null=True)),
+                ('hair_color', models.CharField(blank=True, max_length=20, null=True)),
+                ('eye_color', models.CharField(blank=True, max_length=20, null=True)),
+                ('hair_style', models.CharField(blank=True, max_length=50, null=True)),
+                ('hair_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('skin_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('body_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('city', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='cities.City')),
+            ],
+            options={
+                'verbose_name_plural': 'Eligibility index',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='eligibilityindex',
+            index_together=set([('gender', 'date_of_birth')]),
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX users_eligibilityindex_languages_gin ON users_eligibilityindex USING gin (languages);',
+            'DROP INDEX users_eligibilityindex_languages_gin;',
+        ),
+        migrations.RunSQL(FILL_ELIGIBILITY_INDEX, migrations.RunSQL.noop),
+    ]
@@ -2,6 +2,7 @@
 from __future__ import unicode_literals
 
 from datetime import date, datetime
+from dateutil.relativedelta import relativedelta
 from cities.models import City, Country, PostalCode
 
 from django.contrib.auth.models import (
@@ -10,10 +11,11 @@ from django.contrib.auth.models import (
     PermissionsMixin,
 )
 from django.contrib.contenttypes.fields import GenericRelation
-from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.fields import JSONField, ArrayField
 from django.core.validators import MaxValueValidator
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
@@ -153,7 +155,9 @@ class User(AbstractBaseUser, PermissionsMixin):
             "Unselect this instead of deleting accounts."
         ),
     )
-    date_joined = models.DateTimeField(_("date joined"), default=timezone.now)
+    date_joined = models.DateTimeField(
+        _("date joined"), default=timezone.now, db_index=True
+    )
     phone = models.CharField(
         unique=True,
         max_length=10,
@@ -496,6 +500,70 @@ class Bio(models.Model):
     objects = hstore.HStoreManager()
 
 
+class PhysicalAttributesManager(models.Manager):
+    """Manager to keep typed physical attributes in sync with bio."""
+
+    # measurements may be fractional, 28.5 for a waist, none is truncated.
+    NUMERIC_FIELDS = ("height", "waist", "shoulders", "chest", "hips", "shoe_size")
+    CHOICE_FIELDS = (
+        "hair_color",
+        "eye_color",
+        "hair_style",
+        "hair_type",
+        "skin_type",
+        "body_type",
+    )
+
+    def values_from_data(self, data):
+        """Convert bio hstore data to typed column values."""
+        data = data or {}
+        values = {}
+        for name in self.NUMERIC_FIELDS:
+            try:
+                values[name] = float(data.get(name))
+            except (TypeError, ValueError):
+                values[name] = None
+        for name in self.CHOICE_FIELDS:
+            values[name] = data.get(name) or None
+        return values
+
+    def sync(self, bio):
+        """Create or update physical attributes row for bio's person."""
+        return self.update_or_create(
+            person_id=bio.person_id, defaults=self.values_from_data(bio.data)
+        )
+
+
+class PhysicalAttributes(models.Model):
+    """Typed and indexed copy of person's bio data used for talent search."""
+
+    person = models.OneToOneField(
+        Person,
+        related_name="physical_attributes",
+        related_query_name="physical_attributes",
+        on_delete=models.CASCADE,
+    )
+    height = models.FloatField(null=True, blank=True, db_index=True)
+    waist = models.FloatField(null=True, blank=True, db_index=True)
+    shoulders = models.FloatField(null=True, blank=True, db_index=True)
+    chest = models.FloatField(null=True, blank=True, db_index=True)
+    hips = models.FloatField(null=True, blank=True, db_index=True)
+    shoe_size = models.FloatField(null=True, blank=True, db_index=True)
+    hair_color = models.CharField(max_length=20, null=True, blank=True, db_index=True)
+    eye_color = models.CharField(max_length=20, null=True, blank=True, db_index=True)
+    hair_style = models.CharField(max_length=50, null=True, blank=True, db_index=True)
+    hair_type = models.CharField(max_length=50, null=True, blank=True, db_index=True)
+    skin_type = models.CharField(max_length=50, null=True, blank=True, db_index=True)
+    body_type = models.CharField(max_length=50, null=True, blank=True, db_index=True)
+
+    objects = PhysicalAttributesManager()
+
+    class Meta:
+        """Meta options."""
+
+        verbose_name_plural = "Physical attributes"
+
+
 class Language(models.Model):
     """This stores Language that can be linked with multiple users."""
 
@@ -727,3 +795,142 @@ class UserPreference(models.Model):
         help_text="Profile states of user.",
     )
     search_preference = JSONField(null=True, blank=True)
+
+
+class EligibilityIndexManager(models.Manager):
+    """Manager to refresh and query talent eligibility index."""
+
+    ATTRIBUTE_FIELDS = (
+        "height",
+        "hair_color",
+        "eye_color",
+        "hair_style",
+        "hair_type",
+        "skin_type",
+        "body_type",
+    )
+
+    def refresh(self, person_ids):
+        """Rebuild index rows of given persons with a few set based queries."""
+        person_ids = set(person_ids)
+        if not person_ids:
+            return
+        persons = Person.objects.filter(id__in=person_ids).values_list(
+            "id", "gender", "date_of_birth", "city_id", "preference__push_notification"
+        )
+        languages = {}
+        for person_id, language_name in Language.person.through.objects.filter(
+            person_id__in=person_ids
+        ).values_list("person_id", "language__language_name"):
+            if language_name:
+                languages.setdefault(person_id, []).append(language_name.lower())
+        attributes = {
+            values["person_id"]: values
+            for values in PhysicalAttributes.objects.filter(
+                person_id__in=person_ids
+            ).values("person_id", *self.ATTRIBUTE_FIELDS)
+        }
+        rows = []
+        for person_id, gender, date_of_birth, city_id, push_notification in persons:
+            row = self.model(
+                person_id=person_id,
+                gender=gender,
+                date_of_birth=date_of_birth,
+                city_id=city_id,
+                languages=sorted(languages.get(person_id, [])),
+                push_notification=push_notification is not False,
+            )
+            for field in self.ATTRIBUTE_FIELDS:
+                setattr(row, field, attributes.get(person_id, {}).get(field))
+            rows.append(row)
+        with transaction.atomic():
+            self.filter(person_id__in=person_ids).delete()
+            self.bulk_create(rows)
+
+    def matching(self, job):
+        """Return index rows of talent matching job requirements.
+
+        Requirements are only applied when the job sets them, and talent who
+        has not filled an attribute, birth date and city included, is not
+        filtered out on it.
+        """
+        queryset = self.all()
+        if job.required_gender != choices.NOT_SPECIFIED:
+            queryset = queryset.filter(
+                gender__in=[job.required_gender, choices.NOT_SPECIFIED]
+            )
+        if job.ages:
+            today = date.today()
+            if job.ages.lower is not None:
+                born_before = today - relativedelta(years=int(job.ages.lower))
+                queryset = queryset.filter(
+                    Q(date_of_birth__lte=born_before) | Q(date_of_birth__isnull=True)
+                )
+            if job.ages.upper is not None:
+                born_after = today - relativedelta(years=int(job.ages.upper))
+                queryset = queryset.filter(
+                    Q(date_of_birth__gte=born_after) | Q(date_of_birth__isnull=True)
+                )
+        if job.location_id:
+            queryset = queryset.filter(
+                Q(city_id=job.location_id) | Q(city__isnull=True)
+            )
+        if job.language:
+            queryset = queryset.filter(
+                Q(languages__contains=[job.language.lower()]) | Q(languages=[])
+            )
+        if job.heights:
+            if job.heights.lower is not None:
+                queryset = queryset.filter(
+                    Q(height__gte=job.heights.lower) | Q(height__isnull=True)
+                )
+            if job.heights.upper is not None:
+                queryset = queryset.filter(
+                    Q(height__lte=job.heights.upper) | Q(height__isnull=True)
+                )
+        for field in (
+            "hair_color",
+            "eye_color",
+            "hair_style",
+            "hair_type",
+            "skin_type",
+            "body_type",
+        ):
+            value = getattr(job, field)
+            if value:
+                queryset = queryset.filter(
+                    Q(**{field: value}) | Q(**{field + "__isnull": True})
+                )
+        return queryset
+
+
+class EligibilityIndex(models.Model):
+    """Denormalized talent segments used to find who matches a job."""
+
+    person = models.OneToOneField(
+        Person,
+        primary_key=True,
+        related_name="eligibility",
+        related_query_name="eligibility",
+        on_delete=models.CASCADE,
+    )
+    gender = models.CharField(max_length=2, choices=choices.GENDER_CHOICES)
+    date_of_birth = models.DateField(null=True, blank=True, db_index=True)
+    city = models.ForeignKey(City, null=True, blank=True, on_delete=models.SET_NULL)
+    languages = ArrayField(models.CharField(max_length=50), default=list, blank=True)
+    push_notification = models.BooleanField(default=True)
+    height = models.FloatField(null=True, blank=True, db_index=True)
+    hair_color = models.CharField(max_length=20, null=True, blank=True)
+    eye_color = models.CharField(max_length=20, null=True, blank=True)
+    hair_style = models.CharField(max_length=50, null=True, blank=True)
+    hair_type = models.CharField(max_length=50, null=True, blank=True)
+    skin_type = models.CharField(max_length=50, null=True, blank=True)
+    body_type = models.CharField(max_length=50, null=True, blank=True)
+
+    objects = EligibilityIndexManager()
+
+    class Meta:
+        """Meta options."""
+
+        verbose_name_plural = "Eligibility index"
+        index_together = (("gender", "date_of_birth"),)
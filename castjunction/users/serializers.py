@@ -9,6 +9,7 @@ from allauth.socialaccount.models import SocialToken
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import authenticate, get_user_model
+from django.db import models
 from django.utils.translation import ugettext_lazy as _
 from cities.models import City, Country
 
@@ -56,7 +57,7 @@ from .models import (
 )
 from .jsonschemas import schema
 from .search_indexes import EducationIndex, ExperienceIndex, SearchableFieldIndex
-from .utils import decode_uid
+from .utils import decode_uid, prefetch_user_relations, USER_IMAGES_LIMIT
 from .adapters import complete_social_login
 
 Product = get_model("catalogue", "Product")
@@ -274,6 +275,22 @@ class CountrySerializer(serializers.ModelSerializer):
         )
 
 
+class UserListSerializer(serializers.ListSerializer):
+    """Serialize a page of users using images and likes loaded in one pass."""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        users = list(iterable)
+        user = None
+        if "request" in self.context:
+            user = self.context["request"].user
+        self.child._prefetched = prefetch_user_relations(users, user)
+        try:
+            return super().to_representation(users)
+        finally:
+            self.child._prefetched = None
+
+
 class UserPartialSerializer(DynamicFieldsModelSerializer):
     city = serializers.SlugRelatedField(
         slug_field="name_std", required=False, queryset=City.objects.all()
@@ -312,9 +329,13 @@ class UserPartialSerializer(DynamicFieldsModelSerializer):
             "interested_professions",
         )
         read_only_fields = ("email",)
+        list_serializer_class = UserListSerializer
 
     def get_profile_photo(self, obj):
-        if obj.user_type == User.PERSON:
+        prefetched = getattr(self, "_prefetched", None)
+        if prefetched is not None:
+            image = prefetched["profile_photo"].get(obj.id)
+        elif obj.user_type == User.PERSON:
             image = obj.person.images.filter(image_type=choices.PRIMARY).last()
         else:
             image = obj.company.images.filter(image_type=choices.PRIMARY).last()
@@ -324,7 +345,10 @@ class UserPartialSerializer(DynamicFieldsModelSerializer):
         return serializer.data
 
     def get_cover_photo(self, obj):
-        if obj.user_type == User.PERSON:
+        prefetched = getattr(self, "_prefetched", None)
+        if prefetched is not None:
+            image = prefetched["cover_photo"].get(obj.id)
+        elif obj.user_type == User.PERSON:
             image = obj.person.images.filter(image_type=choices.COVER).last()
         else:
             image = obj.company.images.filter(image_type=choices.COVER).last()
@@ -334,10 +358,17 @@ class UserPartialSerializer(DynamicFieldsModelSerializer):
         return serializer.data
 
     def get_user_images(self, obj):
-        if obj.user_type == User.PERSON:
-            images = obj.person.images.filter(image_type=choices.GENERIC)[:4]
+        prefetched = getattr(self, "_prefetched", None)
+        if prefetched is not None:
+            images = prefetched["user_images"].get(obj.id)
+        elif obj.user_type == User.PERSON:
+            images = obj.person.images.filter(image_type=choices.GENERIC)[
+                :USER_IMAGES_LIMIT
+            ]
         else:
-            images = obj.company.images.filter(image_type=choices.GENERIC)[:4]
+            images = obj.company.images.filter(image_type=choices.GENERIC)[
+                :USER_IMAGES_LIMIT
+            ]
         if images:
             serializer = ImageSerializer(
                 images, many=True, context={"request": self.context["request"]}
@@ -346,6 +377,9 @@ class UserPartialSerializer(DynamicFieldsModelSerializer):
         return None
 
     def get_likes(self, obj):
+        prefetched = getattr(self, "_prefetched", None)
+        if prefetched is not None:
+            return obj.id in prefetched["likes"]
         try:
             if "request" in self.context:
                 user = self.context["request"].user
@@ -373,6 +407,7 @@ class UserSerializer(UserPartialSerializer):
             "phone",
         )
         read_only_fields = ("email",)
+        list_serializer_class = UserListSerializer
 
 
 # Get the UserModel
@@ -402,6 +437,7 @@ class PersonPartialSerializer(UserPartialSerializer):
             "known_languages",
         )
         related_fields = ["bio"]
+        list_serializer_class = UserListSerializer
 
     def get_gender(self, obj):
         return obj.get_gender_display()
@@ -423,12 +459,14 @@ class PersonSerializer(PersonPartialSerializer):
             "phone",
         )
         related_fields = ["bio"]
+        list_serializer_class = UserListSerializer
 
 
 class CompanyPartialSerializer(UserPartialSerializer):
     class Meta:
         model = Company
         fields = UserPartialSerializer.Meta.fields
+        list_serializer_class = UserListSerializer
 
 
 class CompanySerializer(CompanyPartialSerializer):
@@ -439,6 +477,7 @@ class CompanySerializer(CompanyPartialSerializer):
             "company_phone",
             "company_website",
         )
+        list_serializer_class = UserListSerializer
 
 
 class TwitterLoginSerializer(BaseTwitterLoginSerializer):
@@ -3,7 +3,7 @@ import django_rq
 from datetime import datetime, timedelta
 
 from django.utils import timezone
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, m2m_changed
 from django.dispatch import receiver
 from django.conf import settings as django_settings
 
@@ -29,7 +29,15 @@ from messaging.messages import (
 from user_tokens.accounts_manager import create_limited_credit_account
 
 from .utils import get_email_context, PERCENTAGE_BASIC_DETAILS_FIELDS
-from .models import UserPreference, User
+from .models import (
+    UserPreference,
+    User,
+    Person,
+    Bio,
+    Language,
+    PhysicalAttributes,
+    EligibilityIndex,
+)
 
 
 def send_verification_reminder_sms(user):
@@ -161,3 +169,64 @@ def remind_to_verify_phone(sender, created, instance, **kwargs):
                 interval=259200,  # 3 days
                 repeat=5,
             )
+
+
+@receiver(post_save, sender=Bio, dispatch_uid="user.sync_physical_attributes")
+def sync_physical_attributes(sender, instance, **kwargs):
+    """Copy bio data to typed physical attributes used by talent search."""
+    PhysicalAttributes.objects.sync(instance)
+    EligibilityIndex.objects.refresh([instance.person_id])
+
+
+@receiver(post_save, sender=Person, dispatch_uid="user.refresh_eligibility")
+def refresh_person_eligibility(sender, instance, **kwargs):
+    """Keep person's eligibility index row in sync with profile."""
+    EligibilityIndex.objects.refresh([instance.id])
+
+
+@receiver(post_save, sender=User, dispatch_uid="user.user.refresh_eligibility")
+def refresh_user_eligibility(sender, instance, update_fields=None, **kwargs):
+    """Refresh index row of a person whose city or birth date changed as user.
+
+    Gender is a field of Person, whose saves refresh the row already.
+    """
+    if update_fields is not None and not {"city", "date_of_birth"} & set(update_fields):
+        return
+    indexed = (
+        EligibilityIndex.objects.filter(person_id=instance.id)
+        .values_list("city_id", "date_of_birth")
+        .first()
+    )
+    if indexed is not None and indexed != (instance.city_id, instance.date_of_birth):
+        EligibilityIndex.objects.refresh([instance.id])
+
+
+@receiver(
+    post_save, sender=UserPreference, dispatch_uid="user.preference.refresh_eligibility"
+)
+def refresh_preference_eligibility(sender, instance, **kwargs):
+    """Push notification preference is part of eligibility index."""
+    EligibilityIndex.objects.refresh([instance.user_id])
+
+
+@receiver(
+    m2m_changed,
+    sender=Language.person.through,
+    dispatch_uid="user.language.refresh_eligibility",
+)
+def refresh_language_eligibility(sender, instance, action, pk_set, **kwargs):
+    """Refresh persons whose known languages changed."""
+    if action not in ("post_add", "post_remove", "post_clear", "pre_clear"):
+        return
+    if isinstance(instance, Person):
+        if action != "pre_clear":
+            EligibilityIndex.objects.refresh([instance.id])
+    elif action == "pre_clear":
+        # persons are gone from relation after clear, remember them first.
+        instance._cleared_person_ids = list(
+            instance.person.values_list("id", flat=True)
+        )
+    elif action == "post_clear":
+        EligibilityIndex.objects.refresh(getattr(instance, "_cleared_person_ids", []))
+    else:
+        EligibilityIndex.objects.refresh(pk_set or [])
@@ -1,5 +1,8 @@
 """Utility methods for user management."""
+from collections import defaultdict
+
 from django.contrib.auth.tokens import default_token_generator
+from django.contrib.contenttypes.models import ContentType
 
 from django.conf import settings as django_settings
 
@@ -7,7 +10,12 @@ from django.utils.crypto import get_random_string
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_text
 
-from .models import User, PersonType, UserIncentives
+from pinax.likes.models import Like
+
+from multimedia.models import Image
+from utils import choices
+
+from .models import User, Person, Company, PersonType, UserIncentives
 
 PERCENTAGE_BASIC_DETAILS_FIELDS = {
     "first_name": 5,
@@ -17,6 +25,9 @@ PERCENTAGE_BASIC_DETAILS_FIELDS = {
     "city": 2,
 }
 
+# number of generic images shown with a user.
+USER_IMAGES_LIMIT = 4
+
 PERCENTAGE_PROFILE_FIELDS = {
     "experiences": 10,
     "educations": 5,
@@ -124,3 +135,50 @@ def increase_percentage(user, field_name):
     )
 
     User.objects.filter(id=user.id).update(profile_completion_percentage=percentage)
+
+
+def prefetch_user_relations(users, user=None):
+    """Load profile, cover and gallery images and likes for a page of users.
+
+    Returns a dict with ``profile_photo`` and ``cover_photo`` (user id ->
+    image), ``user_images`` (user id -> list of images) and ``likes``
+    (set of user ids liked by ``user``).
+    """
+    prefetched = {
+        "profile_photo": {},
+        "cover_photo": {},
+        "user_images": defaultdict(list),
+        "likes": set(),
+    }
+    if not users:
+        return prefetched
+    content_types = {
+        User.PERSON: ContentType.objects.get_for_model(Person),
+        User.COMPANY: ContentType.objects.get_for_model(Company),
+    }
+    user_types = {obj.id: content_types[obj.user_type].id for obj in users}
+    images = Image.objects.filter(
+        content_type__in=content_types.values(),
+        object_id__in=user_types.keys(),
+        image_type__in=[choices.PRIMARY, choices.COVER, choices.GENERIC],
+    ).order_by("id")
+    for image in images:
+        if user_types.get(image.object_id) != image.content_type_id:
+            continue
+        if image.image_type == choices.PRIMARY:
+            # latest primary image wins, same as ``.last()``.
+            prefetched["profile_photo"][image.object_id] = image
+        elif image.image_type == choices.COVER:
+            prefetched["cover_photo"][image.object_id] = image
+        elif len(prefetched["user_images"][image.object_id]) < USER_IMAGES_LIMIT:
+            prefetched["user_images"][image.object_id].append(image)
+
+    if user is not None and not user.is_anonymous():
+        prefetched["likes"] = set(
+            Like.objects.filter(
+                sender=user,
+                receiver_content_type=ContentType.objects.get_for_model(User),
+                receiver_object_id__in=user_types.keys(),
+            ).values_list("receiver_object_id", flat=True)
+        )
+    return prefetched
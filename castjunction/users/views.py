@@ -46,6 +46,11 @@ from project.serializers import JobSerializer
 from project.models import Job
 from utils import choices
 from utils.utils import last_day_of_month, string_to_date
+from utils.pagination import (
+    KeysetPaginationMixin,
+    CreatedAtKeysetPagination,
+    DateJoinedKeysetPagination,
+)
 
 from .models import (
     User,
@@ -54,6 +59,7 @@ from .models import (
     Education,
     Institute,
     Bio,
+    PhysicalAttributes,
     Language,
     Skill,
     SearchableField,
@@ -775,8 +781,12 @@ class ScheduledInvitesViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     filter_backends = (filters.OrderingFilter,)
 
     def get_queryset(self):
-        return Application.objects.filter(
-            job__created_by=self.request.user, state=State.INVITED
+        return (
+            Application.objects.filter(
+                job__created_by=self.request.user, state=State.INVITED
+            )
+            .select_related("user")
+            .prefetch_related("audition_invites")
         )
 
 
@@ -791,6 +801,64 @@ class PersonFilter(django_filters.FilterSet):
     photo_count = django_filters.MethodFilter()
     stageroute_score = django_filters.MethodFilter()
 
+    # range filters on typed physical attributes.
+    min_height = django_filters.NumberFilter(
+        name="physical_attributes__height", lookup_expr="gte"
+    )
+    max_height = django_filters.NumberFilter(
+        name="physical_attributes__height", lookup_expr="lte"
+    )
+    min_waist = django_filters.NumberFilter(
+        name="physical_attributes__waist", lookup_expr="gte"
+    )
+    max_waist = django_filters.NumberFilter(
+        name="physical_attributes__waist", lookup_expr="lte"
+    )
+    min_shoulders = django_filters.NumberFilter(
+        name="physical_attributes__shoulders", lookup_expr="gte"
+    )
+    max_shoulders = django_filters.NumberFilter(
+        name="physical_attributes__shoulders", lookup_expr="lte"
+    )
+    min_chest = django_filters.NumberFilter(
+        name="physical_attributes__chest", lookup_expr="gte"
+    )
+    max_chest = django_filters.NumberFilter(
+        name="physical_attributes__chest", lookup_expr="lte"
+    )
+    min_hips = django_filters.NumberFilter(
+        name="physical_attributes__hips", lookup_expr="gte"
+    )
+    max_hips = django_filters.NumberFilter(
+        name="physical_attributes__hips", lookup_expr="lte"
+    )
+    min_shoe_size = django_filters.NumberFilter(
+        name="physical_attributes__shoe_size", lookup_expr="gte"
+    )
+    max_shoe_size = django_filters.NumberFilter(
+        name="physical_attributes__shoe_size", lookup_expr="lte"
+    )
+
+    # multi value filters e.g. ?hair_color=black,dark_brown
+    hair_color = django_filters.filters.BaseInFilter(
+        name="physical_attributes__hair_color"
+    )
+    eye_color = django_filters.filters.BaseInFilter(
+        name="physical_attributes__eye_color"
+    )
+    hair_style = django_filters.filters.BaseInFilter(
+        name="physical_attributes__hair_style"
+    )
+    hair_type = django_filters.filters.BaseInFilter(
+        name="physical_attributes__hair_type"
+    )
+    skin_type = django_filters.filters.BaseInFilter(
+        name="physical_attributes__skin_type"
+    )
+    body_type = django_filters.filters.BaseInFilter(
+        name="physical_attributes__body_type"
+    )
+
     def filter_stageroute_score(self, queryset, value):
         if value:
             return queryset.filter(stageroute_score__gte=value)
@@ -813,10 +881,24 @@ class PersonFilter(django_filters.FilterSet):
             # try to convert string to dict
             try:
                 value = ast.literal_eval(value)
-            except Exception as e:
-                raise e
-
-            return queryset.filter(bio__data__contains=value)
+            except (ValueError, SyntaxError):
+                raise ValidationError("bio should be a dictionary of attributes.")
+            if not isinstance(value, dict):
+                raise ValidationError("bio should be a dictionary of attributes.")
+
+            # known attributes are matched on indexed typed columns, anything
+            # else, values that do not convert included, still falls back to
+            # hstore containment on bio data.
+            typed_values = PhysicalAttributes.objects.values_from_data(value)
+            lookups = {}
+            for key in list(value.keys()):
+                if typed_values.get(key) is not None:
+                    lookups["physical_attributes__" + key] = typed_values[key]
+                    value.pop(key)
+            if lookups:
+                queryset = queryset.filter(**lookups)
+            if value:
+                queryset = queryset.filter(bio__data__contains=value)
         return queryset
 
     def filter_min_age(self, queryset, value):
@@ -843,9 +925,18 @@ class PersonFilter(django_filters.FilterSet):
         model = Person
 
 
-class PersonViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class PersonViewSet(
+    KeysetPaginationMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
     serializer_class = PersonSerializer
-    queryset = Person.objects.all()
+    queryset = Person.objects.select_related(
+        "city", "nationality", "bio"
+    ).prefetch_related(
+        "skills",
+        "known_languages",
+        "educations__institute",
+        "experiences__location",
+    )
     permission_classes = (AllowAny,)
     filter_backends = (
         filters.DjangoFilterBackend,
@@ -860,6 +951,7 @@ class PersonViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     # default order for persons listing.
     ordering = ("-date_joined",)
     filter_class = PersonFilter
+    keyset_pagination_class = DateJoinedKeysetPagination
     search_fields = (
         "=email",
         "=phone",
@@ -978,7 +1070,9 @@ class UserEarningsView(generics.ListAPIView):
             raise ValidationError("No permission to view earnings.")
 
 
-class ApplicationsOnJobsViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class ApplicationsOnJobsViewSet(
+    KeysetPaginationMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
     permission_classes = (IsCastingDirector,)
     serializer_class = ApplicationDetailSerializer
     filter_backends = (
@@ -991,11 +1085,15 @@ class ApplicationsOnJobsViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     )
     ordering_fields = ("created_at",)
     ordering = ("-created_at",)
+    keyset_pagination_class = CreatedAtKeysetPagination
 
     def get_queryset(self):
-        applications = Application.objects.filter(
-            job__created_by=self.request.user
-        ).exclude(state__in=[State.IGNORED, State.PIPELINED])
+        applications = (
+            Application.objects.filter(job__created_by=self.request.user)
+            .exclude(state__in=[State.IGNORED, State.PIPELINED])
+            .select_related("user", "job")
+            .prefetch_related("audition_invites")
+        )
         return applications
 
 
@@ -0,0 +1,52 @@
+"""Pagination classes for the project apis."""
+from rest_framework.pagination import CursorPagination
+
+CURSOR_PAGINATION = "cursor"
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination on an indexed ordering.
+
+    Every page is fetched by seeking past the last seen value of the ordering
+    field, so deep pages cost the same as the first one and no total count
+    is computed.
+    """
+
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+
+class CreatedAtKeysetPagination(KeysetPagination):
+    ordering = "-created_at"
+
+
+class UpdatedAtKeysetPagination(KeysetPagination):
+    ordering = "-updated_at"
+
+
+class DateJoinedKeysetPagination(KeysetPagination):
+    ordering = "-date_joined"
+
+
+class SentAtKeysetPagination(KeysetPagination):
+    ordering = "-sent_at"
+
+
+class KeysetPaginationMixin(object):
+    """Page a viewset by cursor when the client asks for ``pagination=cursor``.
+
+    Viewsets set ``keyset_pagination_class``; requests without the parameter
+    keep using the default limit/offset pagination.
+    """
+
+    keyset_pagination_class = None
+    pagination_query_param = "pagination"
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            mode = self.request.query_params.get(self.pagination_query_param)
+            if self.keyset_pagination_class and mode == CURSOR_PAGINATION:
+                self._paginator = self.keyset_pagination_class()
+                return self._paginator
+        return super().paginator